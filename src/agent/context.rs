@@ -1,15 +1,16 @@
+use std::collections::HashMap;
+use std::fmt::Write;
+use std::sync::{Arc, Mutex, OnceLock};
+
+use tiktoken_rs::CoreBPE;
+
 use crate::agent::AgentMessage;
 
-pub fn count_tokens(messages: &[AgentMessage], model: &str) -> usize {
-    let text = messages
-        .iter()
-        .map(message_to_text)
-        .collect::<Vec<_>>()
-        .join("\n");
+type EncoderCache = Mutex<HashMap<String, Option<Arc<CoreBPE>>>>;
 
-    tiktoken_rs::bpe_for_model(model)
-        .map(|bpe| bpe.encode_ordinary(&text).len())
-        .unwrap_or_else(|_| approximate_tokens(&text))
+pub fn count_tokens(messages: &[AgentMessage], model: &str) -> usize {
+    let bpe = encoder_for_model(model);
+    count_text_tokens(bpe.as_deref(), &messages_to_text(messages))
 }
 
 pub fn trim_messages(
@@ -17,54 +18,118 @@ pub fn trim_messages(
     model: &str,
     max_context_tokens: usize,
 ) -> Vec<AgentMessage> {
-    if count_tokens(messages, model) <= max_context_tokens {
+    let bpe = encoder_for_model(model);
+    if count_text_tokens(bpe.as_deref(), &messages_to_text(messages)) <= max_context_tokens {
         return messages.to_vec();
     }
 
+    let mut text = String::new();
+    let mut message_tokens = |message: &AgentMessage| {
+        text.clear();
+        text.push('\n');
+        push_message_text(&mut text, message);
+        count_text_tokens(bpe.as_deref(), &text)
+    };
     let system_messages = messages
         .iter()
         .filter(|message| matches!(message, AgentMessage::System { .. }))
         .cloned()
         .collect::<Vec<_>>();
+    let mut used_tokens = system_messages
+        .iter()
+        .map(&mut message_tokens)
+        .sum::<usize>();
     let mut recent_messages = Vec::new();
+    let mut recent_tokens = Vec::new();
 
     for message in messages
         .iter()
         .rev()
         .filter(|message| !matches!(message, AgentMessage::System { .. }))
     {
-        let mut candidate = system_messages.clone();
-        candidate.push(message.clone());
-        candidate.extend(recent_messages.iter().rev().cloned());
-        if count_tokens(&candidate, model) > max_context_tokens && !recent_messages.is_empty() {
+        let tokens = message_tokens(message);
+        if used_tokens + tokens > max_context_tokens && !recent_messages.is_empty() {
             break;
         }
+        used_tokens += tokens;
         recent_messages.push(message.clone());
+        recent_tokens.push(tokens);
     }
 
+    let system_count = system_messages.len();
     let mut selected = system_messages;
     selected.extend(recent_messages.into_iter().rev());
+
+    let mut total_tokens = count_text_tokens(bpe.as_deref(), &messages_to_text(&selected));
+    let mut dropped = 0;
+    for tokens in recent_tokens
+        .iter()
+        .rev()
+        .take(recent_tokens.len().saturating_sub(1))
+    {
+        if total_tokens <= max_context_tokens {
+            break;
+        }
+        total_tokens = total_tokens.saturating_sub(*tokens);
+        dropped += 1;
+    }
+    selected.drain(system_count..system_count + dropped);
     selected
 }
 
-fn message_to_text(message: &AgentMessage) -> String {
-    match message {
-        AgentMessage::System { content } => format!("system: {content}"),
-        AgentMessage::User { content } => format!("user: {content}"),
-        AgentMessage::UserWithImages { content, images } => {
-            format!("user: {content} [attachments: {} image(s)]", images.len())
+fn encoder_for_model(model: &str) -> Option<Arc<CoreBPE>> {
+    static ENCODERS: OnceLock<EncoderCache> = OnceLock::new();
+    let encoders = ENCODERS.get_or_init(Default::default);
+    if let Ok(encoders) = encoders.lock()
+        && let Some(bpe) = encoders.get(model)
+    {
+        return bpe.clone();
+    }
+
+    let bpe = tiktoken_rs::bpe_for_model(model).ok().map(Arc::new);
+    if let Ok(mut encoders) = encoders.lock() {
+        encoders.insert(model.to_string(), bpe.clone());
+    }
+    bpe
+}
+
+fn count_text_tokens(bpe: Option<&CoreBPE>, text: &str) -> usize {
+    bpe.map(|bpe| bpe.encode_ordinary(text).len())
+        .unwrap_or_else(|| approximate_tokens(text))
+}
+
+fn messages_to_text(messages: &[AgentMessage]) -> String {
+    let mut text = String::new();
+    for (index, message) in messages.iter().enumerate() {
+        if index > 0 {
+            text.push('\n');
         }
+        push_message_text(&mut text, message);
+    }
+    text
+}
+
+fn push_message_text(out: &mut String, message: &AgentMessage) {
+    let _ = match message {
+        AgentMessage::System { content } => write!(out, "system: {content}"),
+        AgentMessage::User { content } => write!(out, "user: {content}"),
+        AgentMessage::UserWithImages { content, images } => write!(
+            out,
+            "user: {content} [attachments: {} image(s)]",
+            images.len()
+        ),
         AgentMessage::Assistant(assistant) => {
-            let calls = assistant
-                .tool_calls
-                .iter()
-                .map(|call| format!("{} {}", call.name, call.arguments))
-                .collect::<Vec<_>>()
-                .join("\n");
-            format!("assistant: {}\n{calls}", assistant.content)
+            let _ = writeln!(out, "assistant: {}", assistant.content);
+            for (index, call) in assistant.tool_calls.iter().enumerate() {
+                if index > 0 {
+                    out.push('\n');
+                }
+                let _ = write!(out, "{} {}", call.name, call.arguments);
+            }
+            Ok(())
         }
-        AgentMessage::Tool(result) => format!("tool {}: {}", result.name, result.content),
-    }
+        AgentMessage::Tool(result) => write!(out, "tool {}: {}", result.name, result.content),
+    };
 }
 
 fn approximate_tokens(text: &str) -> usize {
@@ -98,6 +163,27 @@ mod tests {
         );
     }
 
+    #[test]
+    fn trimmed_messages_fit_budget_including_separators() {
+        let mut messages = vec![AgentMessage::System {
+            content: "s".to_string(),
+        }];
+        messages.extend((0..40).map(|_| AgentMessage::User {
+            content: "xy".to_string(),
+        }));
+
+        for model in ["unknown-local-model", "gpt-4o"] {
+            for max_context_tokens in 2..=120 {
+                let trimmed = trim_messages(&messages, model, max_context_tokens);
+                assert!(
+                    trimmed.len() == 2 || count_tokens(&trimmed, model) <= max_context_tokens,
+                    "{model} with budget {max_context_tokens} kept {} messages",
+                    trimmed.len()
+                );
+            }
+        }
+    }
+
     #[test]
     fn trim_preserves_order_with_duplicate_messages() {
         let duplicate = AgentMessage::User {
@@ -1,3 +1,5 @@
+use futures_util::future::join_all;
+
 use crate::agent::{
     AgentMessage, AgentTurnResult, AssistantMessage, CancellationToken, ProviderEvent, ToolCall,
     trim_messages,
@@ -74,7 +76,7 @@ where
         G: FnMut(&ToolCall),
     {
         let mut messages = starting_messages.to_vec();
-        let mut new_messages = Vec::new();
+        let new_messages_start = messages.len();
         let mut usage = None;
 
         for _ in 0..self.config.max_turns {
@@ -101,27 +103,67 @@ where
             let final_text = assistant.content.clone();
             let assistant_message = AgentMessage::Assistant(assistant);
             on_message(&assistant_message);
-            messages.push(assistant_message.clone());
-            new_messages.push(assistant_message);
+            messages.push(assistant_message);
 
             if tool_calls.is_empty() {
                 return Ok(AgentTurnResult {
-                    new_messages,
+                    new_messages: messages.split_off(new_messages_start),
                     final_text,
                     usage,
                 });
             }
 
-            for call in tool_calls {
+            let mut pending_calls = tool_calls.into_iter().peekable();
+            while let Some(call) = pending_calls.next() {
                 check_cancelled(cancellation_token)?;
                 on_tool_start(&call);
+                if runs_concurrently(&call.name)
+                    && pending_calls
+                        .peek()
+                        .is_some_and(|next| runs_concurrently(&next.name))
+                {
+                    let mut batch = vec![call];
+                    while let Some(next) =
+                        pending_calls.next_if(|next| runs_concurrently(&next.name))
+                    {
+                        on_tool_start(&next);
+                        batch.push(next);
+                    }
+                    let batch = join_all(batch.into_iter().map(move |call| async move {
+                        self.tools
+                            .execute_cancellable(
+                                call.id,
+                                &call.name,
+                                call.arguments,
+                                cancellation_token,
+                            )
+                            .await
+                    }));
+                    let results = tokio::select! {
+                        results = batch => results,
+                        _ = cancellation_token.cancelled() => return Err(ProviderError::Cancelled),
+                    };
+                    check_cancelled(cancellation_token)?;
+                    for result in results {
+                        let tool_message = AgentMessage::Tool(result);
+                        on_message(&tool_message);
+                        messages.push(tool_message);
+                    }
+                    continue;
+                }
+
+                let ToolCall {
+                    id,
+                    name,
+                    arguments,
+                } = call;
                 let result = tokio::select! {
                     result = self
                         .tools
                         .execute_cancellable(
-                            call.id.clone(),
-                            &call.name,
-                            call.arguments.clone(),
+                            id,
+                            &name,
+                            arguments,
                             cancellation_token,
                         ) => result,
                     _ = cancellation_token.cancelled() => return Err(ProviderError::Cancelled),
@@ -129,8 +171,7 @@ where
                 check_cancelled(cancellation_token)?;
                 let tool_message = AgentMessage::Tool(result);
                 on_message(&tool_message);
-                messages.push(tool_message.clone());
-                new_messages.push(tool_message);
+                messages.push(tool_message);
             }
         }
 
@@ -138,6 +179,10 @@ where
     }
 }
 
+fn runs_concurrently(tool_name: &str) -> bool {
+    tool_name == "fetch"
+}
+
 fn check_cancelled(cancellation_token: &CancellationToken) -> Result<(), ProviderError> {
     if cancellation_token.is_cancelled() {
         Err(ProviderError::Cancelled)
@@ -174,3 +219,164 @@ fn assistant_from_events(events: Vec<ProviderEvent>) -> Result<AssistantMessage,
     }
     Ok(message)
 }
+
+#[cfg(test)]
+mod tests {
+    use std::cell::RefCell;
+    use std::time::{Duration, Instant};
+
+    use async_trait::async_trait;
+    use serde_json::json;
+    use wiremock::matchers::{method, path};
+    use wiremock::{Mock, MockServer, ResponseTemplate};
+
+    use super::*;
+    use crate::tools::ToolDefinition;
+
+    struct FetchBatchProvider {
+        pages: &'static [&'static str],
+    }
+
+    #[async_trait]
+    impl Provider for FetchBatchProvider {
+        async fn complete(
+            &self,
+            messages: &[AgentMessage],
+            _tools: &[ToolDefinition],
+        ) -> Result<AssistantMessage, ProviderError> {
+            let has_tool_result = messages
+                .iter()
+                .any(|message| matches!(message, AgentMessage::Tool(_)));
+            Ok(AssistantMessage {
+                content: if has_tool_result {
+                    "done".to_string()
+                } else {
+                    String::new()
+                },
+                tool_calls: if has_tool_result {
+                    Vec::new()
+                } else {
+                    self.pages
+                        .iter()
+                        .map(|page| ToolCall {
+                            id: format!("call_{page}"),
+                            name: "fetch".to_string(),
+                            arguments: json!({"intent": "read a page", "url": page}),
+                        })
+                        .collect()
+                },
+                usage: None,
+                metadata: Default::default(),
+            })
+        }
+    }
+
+    fn fetch_batch_loop(
+        pages: &'static [&'static str],
+        server: &MockServer,
+    ) -> AgentLoop<FetchBatchProvider> {
+        AgentLoop::new(
+            FetchBatchProvider { pages },
+            ToolRegistry::new().with_fetch_reader_url(server.uri()),
+            AgentLoopConfig {
+                max_turns: 2,
+                max_context_tokens: 16_384,
+                model: "mock".to_string(),
+            },
+        )
+    }
+
+    #[tokio::test]
+    async fn consecutive_fetch_calls_run_concurrently_in_call_order() {
+        let server = MockServer::start().await;
+        for (page, delay_ms) in [("slow", 600), ("medium", 300), ("fast", 100)] {
+            Mock::given(method("GET"))
+                .and(path(format!("/{page}")))
+                .respond_with(
+                    ResponseTemplate::new(200)
+                        .set_body_string(format!("{page} page"))
+                        .set_delay(Duration::from_millis(delay_ms)),
+                )
+                .mount(&server)
+                .await;
+        }
+        let loop_runner = fetch_batch_loop(&["slow", "medium", "fast"], &server);
+        let observed = RefCell::new(Vec::new());
+
+        let started = Instant::now();
+        let turn = loop_runner
+            .run_turn_cancellable_with_observer(
+                &[AgentMessage::User {
+                    content: "fetch three pages".to_string(),
+                }],
+                &CancellationToken::new(),
+                |message| {
+                    if let AgentMessage::Tool(result) = message {
+                        observed
+                            .borrow_mut()
+                            .push(format!("result {}", result.tool_call_id));
+                    }
+                },
+                |call| observed.borrow_mut().push(format!("start {}", call.id)),
+            )
+            .await
+            .expect("turn");
+        let elapsed = started.elapsed();
+
+        assert!(
+            elapsed < Duration::from_millis(1_000),
+            "batch took {elapsed:?}, expected less than the 1s sum of delays"
+        );
+        assert_eq!(
+            observed.into_inner(),
+            [
+                "start call_slow",
+                "start call_medium",
+                "start call_fast",
+                "result call_slow",
+                "result call_medium",
+                "result call_fast",
+            ]
+        );
+        let contents = turn
+            .new_messages
+            .iter()
+            .filter_map(|message| match message {
+                AgentMessage::Tool(result) => Some(result.content.as_str()),
+                _ => None,
+            })
+            .collect::<Vec<_>>();
+        assert_eq!(contents.len(), 3);
+        assert!(contents[0].ends_with("slow page"));
+        assert!(contents[1].ends_with("medium page"));
+        assert!(contents[2].ends_with("fast page"));
+        assert_eq!(turn.final_text, "done");
+    }
+
+    #[tokio::test]
+    async fn cancelling_aborts_an_in_flight_fetch_batch() {
+        let server = MockServer::start().await;
+        Mock::given(method("GET"))
+            .respond_with(ResponseTemplate::new(200).set_delay(Duration::from_secs(60)))
+            .mount(&server)
+            .await;
+        let loop_runner = fetch_batch_loop(&["hang-1", "hang-2"], &server);
+        let token = CancellationToken::new();
+
+        let messages = [AgentMessage::User {
+            content: "fetch two pages".to_string(),
+        }];
+        let turn = loop_runner.run_turn_cancellable(&messages, &token);
+        tokio::pin!(turn);
+
+        tokio::time::sleep(Duration::from_millis(100)).await;
+        token.cancel();
+
+        let err = tokio::time::timeout(Duration::from_secs(1), turn)
+            .await
+            .expect("turn should abort promptly")
+            .expect_err("cancelled turn should fail");
+
+        assert!(matches!(err, ProviderError::Cancelled));
+    }
+}
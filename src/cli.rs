@@ -11,10 +11,12 @@ use reedline::{
     ReedlineMenu, ReedlineRawEvent, Signal, Span, Suggestion, Vi, default_vi_insert_keybindings,
     default_vi_normal_keybindings,
 };
+use serde::Deserialize;
+use std::borrow::Cow;
 use std::error::Error;
-use std::io::{IsTerminal, Read};
+use std::io::{BufWriter, IsTerminal, Read, Write};
 use std::sync::{
-    Arc, RwLock,
+    Arc, OnceLock, RwLock,
     atomic::{AtomicBool, Ordering},
 };
 use std::time::Duration;
@@ -31,7 +33,10 @@ use crate::session::{Session, SessionStore};
 use crate::tools::ToolRegistry;
 
 const COMPLETION_MENU_NAME: &str = "completion_menu";
+const OPENAI_CHAT_MODEL_PREFIXES: [&str; 2] = ["gpt-", "o"];
 const TOGGLE_TALK_HOST_COMMAND: &str = "agent:toggle-talk";
+const SYSTEM_PROMPT: &str = "You are a highly autonomous AI command line agent designed to help users with software engineering tasks, system operations, research, and problem-solving. Be concise, direct, and action-oriented.";
+const COMMAND_MODE_SYSTEM_PROMPT: &str = "Command-buffer mode: produce the text the user wants placed into their zsh prompt. Prefer a single bash/zsh command when the user is asking for a command. Return only the command/text to insert, with no Markdown fences or explanatory prose.";
 
 #[derive(Debug, Clone, PartialEq, Eq)]
 enum PromptInput {
@@ -121,9 +126,7 @@ async fn run_with_args_and_prefill(
     }
 
     if args.list_models {
-        for model in list_models().await {
-            println!("{model}");
-        }
+        print_models(&list_models().await);
         return Ok(());
     }
 
@@ -176,7 +179,7 @@ async fn run_with_args_and_prefill(
                 &store,
                 &mut session,
                 &model_name,
-                &system_prompt(),
+                SYSTEM_PROMPT,
             )
             .await?
             {
@@ -219,7 +222,7 @@ async fn run_with_args_and_prefill(
         let image_paths = pending_images.take().unwrap_or_default();
         let parsed_input = parse_user_input(&user_input, image_paths)?;
         if parsed_input.images.is_empty() {
-            match handle_slash_command(&user_input, &args, &store, &mut session).await? {
+            match handle_slash_command(&user_input, &store, &mut session).await? {
                 SlashCommandResult::NotCommand => {}
                 SlashCommandResult::Handled => {
                     loop_runner = None;
@@ -290,7 +293,8 @@ async fn run_with_args_and_prefill(
         match result {
             Ok(result) => {
                 session.messages.extend(result.new_messages);
-                session.replace_messages(session.messages.clone());
+                let messages = std::mem::take(&mut session.messages);
+                session.replace_messages(messages);
                 store.save(&session)?;
                 play_turn_completed_sound();
             }
@@ -438,23 +442,9 @@ async fn run_command_mode(args: &Args) -> Result<(), Box<dyn Error>> {
     }
 
     let store = SessionStore::new()?;
-    let mut session = load_or_create_session(
-        &Args {
-            model: args.model.clone(),
-            list_models: false,
-            update_pricing: false,
-            single: true,
-            talk: false,
-            command: false,
-            resume: None,
-            new: true,
-            images: Vec::new(),
-            query: Vec::new(),
-        },
-        &store,
-    )?;
+    let mut session = create_session(&store)?;
     session.messages.push(AgentMessage::System {
-        content: command_mode_system_prompt(),
+        content: COMMAND_MODE_SYSTEM_PROMPT.to_string(),
     });
     let command_content = args.query.join(" ");
     session.messages.push(if args.images.is_empty() {
@@ -683,9 +673,13 @@ fn load_or_create_session(args: &Args, store: &SessionStore) -> Result<Session,
         }
     }
 
+    create_session(store)
+}
+
+fn create_session(store: &SessionStore) -> Result<Session, Box<dyn Error>> {
     let mut messages = Vec::new();
     messages.push(AgentMessage::System {
-        content: system_prompt(),
+        content: SYSTEM_PROMPT.to_string(),
     });
     let memory = load_all_agents_memory(None);
     if !memory.is_empty() {
@@ -703,25 +697,27 @@ fn print_agent_header(model_name: &str) {
 }
 
 fn replay_session(session: &Session, display: &TerminalDisplay) {
+    let mut out = BufWriter::new(std::io::stdout().lock());
     let mut tool_calls = std::collections::HashMap::new();
     for message in &session.messages {
-        display.render_new_message(message);
+        let _ = display.write_new_message(&mut out, message);
         match message {
             AgentMessage::Assistant(assistant) => {
-                for call in &assistant.tool_calls {
-                    tool_calls.insert(call.id.clone(), call.clone());
-                }
+                tool_calls.extend(
+                    assistant
+                        .tool_calls
+                        .iter()
+                        .map(|call| (call.id.as_str(), call)),
+                );
             }
             AgentMessage::Tool(result) => {
-                let call = tool_calls.remove(&result.tool_call_id);
-                print!(
-                    "{}",
-                    display.format_tool_result_for_call(result, call.as_ref())
-                );
+                let call = tool_calls.remove(result.tool_call_id.as_str());
+                let _ = out.write_all(display.format_tool_result_for_call(result, call).as_bytes());
             }
             _ => {}
         }
     }
+    let _ = out.flush();
 }
 
 async fn prompt_for_input(
@@ -744,10 +740,7 @@ async fn prompt_for_input(
     )?);
     let dynamic_models = Arc::new(RwLock::new(Vec::new()));
     spawn_model_completion_refresh(Arc::clone(&dynamic_models));
-    let completer = Box::new(AgentCompleter::with_dynamic_models(
-        completion_candidates(store, &[]),
-        dynamic_models,
-    ));
+    let completer = Box::new(AgentCompleter::for_prompt(store, dynamic_models));
     let mut line_editor = Reedline::create()
         .use_bracketed_paste(true)
         .with_history(history)
@@ -798,7 +791,6 @@ enum SlashCommandResult {
 
 async fn handle_slash_command(
     input: &str,
-    args: &Args,
     store: &SessionStore,
     session: &mut Session,
 ) -> Result<SlashCommandResult, Box<dyn Error>> {
@@ -817,31 +809,14 @@ async fn handle_slash_command(
             println!("{}", slash_help());
         }
         "/clear" | "/new" => {
-            let new_session = load_or_create_session(
-                &Args {
-                    new: true,
-                    resume: None,
-                    images: Vec::new(),
-                    query: Vec::new(),
-                    single: args.single,
-                    model: args.model.clone(),
-                    list_models: false,
-                    update_pricing: false,
-                    talk: false,
-                    command: false,
-                },
-                store,
-            )?;
-            *session = new_session;
+            *session = create_session(store)?;
             store.save(session)?;
             println!("cleared");
             println!("sessionId: {}", session.session_id);
         }
         "/models" => {
             if rest.is_empty() {
-                for model in list_models().await {
-                    println!("{model}");
-                }
+                print_models(&list_models().await);
             } else {
                 return Ok(SlashCommandResult::SwitchModel(rest.to_string()));
             }
@@ -888,62 +863,128 @@ fn build_loop_runner(model_name: &str) -> Result<AgentLoop<Box<dyn Provider>>, B
     ))
 }
 
+#[derive(Debug, Deserialize)]
+struct OpenAiModelList {
+    #[serde(default)]
+    data: Vec<ModelEntry<OpenAiModel>>,
+}
+
+#[derive(Debug, Deserialize)]
+struct OpenAiModel {
+    id: String,
+}
+
+#[derive(Debug, Deserialize)]
+struct OllamaModelList {
+    #[serde(default)]
+    models: Vec<ModelEntry<OllamaModel>>,
+}
+
+#[derive(Debug, Deserialize)]
+struct OllamaModel {
+    name: String,
+}
+
+#[derive(Debug, Deserialize)]
+#[serde(untagged)]
+enum ModelEntry<T> {
+    Valid(T),
+    Malformed(serde::de::IgnoredAny),
+}
+
+impl<T> ModelEntry<T> {
+    fn valid(self) -> Option<T> {
+        match self {
+            Self::Valid(model) => Some(model),
+            Self::Malformed(_) => None,
+        }
+    }
+}
+
+fn print_models(models: &[String]) {
+    let mut out = BufWriter::new(std::io::stdout().lock());
+    for model in models {
+        let _ = writeln!(out, "{model}");
+    }
+    let _ = out.flush();
+}
+
 async fn list_models() -> Vec<String> {
-    let mut models = Vec::new();
-    let client = match reqwest::Client::builder()
-        .timeout(Duration::from_secs(2))
-        .build()
-    {
-        Ok(client) => client,
-        Err(_) => return models,
+    let Some(client) = model_discovery_client() else {
+        return Vec::new();
     };
 
+    let (mut models, ollama_models) =
+        tokio::join!(list_openai_models(client), list_ollama_models(client));
+    models.extend(ollama_models);
+    models.sort();
+    models.dedup();
+    models
+}
+
+fn model_discovery_client() -> Option<&'static reqwest::Client> {
+    static CLIENT: OnceLock<Option<reqwest::Client>> = OnceLock::new();
+    CLIENT
+        .get_or_init(|| {
+            reqwest::Client::builder()
+                .timeout(Duration::from_secs(2))
+                .pool_max_idle_per_host(4)
+                .build()
+                .ok()
+        })
+        .as_ref()
+}
+
+async fn list_openai_models(client: &reqwest::Client) -> Vec<String> {
     if let Ok(api_key) = std::env::var("OPENAI_API_KEY")
         && let Ok(response) = client
             .get("https://api.openai.com/v1/models")
             .bearer_auth(api_key)
             .send()
             .await
-        && let Ok(value) = response.json::<serde_json::Value>().await
-        && let Some(data) = value.get("data").and_then(|value| value.as_array())
+        && let Ok(list) = response.json::<OpenAiModelList>().await
     {
-        models.extend(data.iter().filter_map(|model| {
-            model
-                .get("id")
-                .and_then(|id| id.as_str())
-                .filter(|id| id.starts_with("gpt-") || id.starts_with('o'))
-                .map(|id| format!("openai:{id}"))
-        }));
+        return openai_model_ids(list);
     }
+    Vec::new()
+}
+
+fn openai_model_ids(list: OpenAiModelList) -> Vec<String> {
+    list.data
+        .into_iter()
+        .filter_map(ModelEntry::valid)
+        .filter(|model| is_openai_chat_model(&model.id))
+        .map(|model| format!("openai:{}", model.id))
+        .collect()
+}
 
+async fn list_ollama_models(client: &reqwest::Client) -> Vec<String> {
     let ollama_url =
         std::env::var("OLLAMA_URL").unwrap_or_else(|_| "http://localhost:11434".to_string());
     if let Ok(response) = client
         .get(format!("{}/api/tags", ollama_url.trim_end_matches('/')))
         .send()
         .await
-        && let Ok(value) = response.json::<serde_json::Value>().await
-        && let Some(data) = value.get("models").and_then(|value| value.as_array())
+        && let Ok(list) = response.json::<OllamaModelList>().await
     {
-        models.extend(data.iter().filter_map(|model| {
-            model
-                .get("name")
-                .and_then(|name| name.as_str())
-                .map(|name| format!("ollama:{name}"))
-        }));
+        return ollama_model_names(list);
     }
-
-    models.sort();
-    models.dedup();
-    models
+    Vec::new()
 }
 
-fn system_prompt() -> String {
-    "You are a highly autonomous AI command line agent designed to help users with software engineering tasks, system operations, research, and problem-solving. Be concise, direct, and action-oriented.".to_string()
+fn ollama_model_names(list: OllamaModelList) -> Vec<String> {
+    list.models
+        .into_iter()
+        .filter_map(ModelEntry::valid)
+        .filter(|model| !model.name.is_empty())
+        .map(|model| format!("ollama:{}", model.name))
+        .collect()
 }
 
-fn command_mode_system_prompt() -> String {
-    "Command-buffer mode: produce the text the user wants placed into their zsh prompt. Prefer a single bash/zsh command when the user is asking for a command. Return only the command/text to insert, with no Markdown fences or explanatory prose.".to_string()
+fn is_openai_chat_model(id: &str) -> bool {
+    OPENAI_CHAT_MODEL_PREFIXES
+        .iter()
+        .any(|prefix| id.starts_with(prefix))
 }
 
 fn spawn_model_completion_refresh(dynamic_models: Arc<RwLock<Vec<String>>>) {
@@ -958,6 +999,12 @@ fn spawn_model_completion_refresh(dynamic_models: Arc<RwLock<Vec<String>>>) {
 }
 
 fn completion_candidates(store: &SessionStore, available_models: &[String]) -> Vec<String> {
+    let mut candidates = command_completion_candidates(store, available_models);
+    candidates.extend(session_completion_candidates(store));
+    candidates
+}
+
+fn command_completion_candidates(store: &SessionStore, available_models: &[String]) -> Vec<String> {
     let mut candidates = vec![
         "/clear".to_string(),
         "/help".to_string(),
@@ -972,7 +1019,11 @@ fn completion_candidates(store: &SessionStore, available_models: &[String]) -> V
             .into_iter()
             .map(|model| format!("/models {model}")),
     );
+    candidates
+}
 
+fn session_completion_candidates(store: &SessionStore) -> Vec<String> {
+    let mut candidates = Vec::new();
     if let Ok(labels) = store.list_session_labels(80) {
         candidates.extend(labels.into_iter().map(|label| format!("/resume {label}")));
     }
@@ -1028,6 +1079,7 @@ pub fn completion_values_for_line_with_models(
 struct AgentCompleter {
     candidates: Vec<String>,
     dynamic_models: Option<Arc<RwLock<Vec<String>>>>,
+    session_store: Option<SessionStore>,
 }
 
 impl AgentCompleter {
@@ -1035,6 +1087,13 @@ impl AgentCompleter {
         Self::from_parts(candidates, None)
     }
 
+    fn for_prompt(store: &SessionStore, dynamic_models: Arc<RwLock<Vec<String>>>) -> Self {
+        Self {
+            session_store: Some(store.clone()),
+            ..Self::with_dynamic_models(command_completion_candidates(store, &[]), dynamic_models)
+        }
+    }
+
     fn with_dynamic_models(
         candidates: Vec<String>,
         dynamic_models: Arc<RwLock<Vec<String>>>,
@@ -1049,10 +1108,17 @@ impl AgentCompleter {
         Self {
             candidates: dedup_preserving_order(candidates),
             dynamic_models,
+            session_store: None,
         }
     }
 
-    fn candidates(&self) -> Vec<String> {
+    fn candidates(&mut self) -> Vec<String> {
+        if let Some(store) = self.session_store.take() {
+            self.candidates
+                .extend(session_completion_candidates(&store));
+            self.candidates = dedup_preserving_order(std::mem::take(&mut self.candidates));
+        }
+
         let mut candidates = self.candidates.clone();
         if let Some(dynamic_models) = &self.dynamic_models
             && let Ok(models) = dynamic_models.read()
@@ -1081,22 +1147,17 @@ impl Completer for AgentCompleter {
         }
 
         let span = Span::new(0, pos);
+        let query = prefix.to_lowercase();
         let candidates = self.candidates();
         let mut matches = candidates
             .iter()
             .enumerate()
             .filter_map(|(index, candidate)| {
-                let score = completion_score(candidate, prefix)?;
+                let score = completion_score(candidate, &query)?;
                 Some((score, index, candidate))
             })
             .collect::<Vec<_>>();
-        matches.sort_by(
-            |(left_score, left_index, _), (right_score, right_index, _)| {
-                left_score
-                    .cmp(right_score)
-                    .then_with(|| left_index.cmp(right_index))
-            },
-        );
+        matches.sort_unstable_by_key(|(score, index, _)| (*score, *index));
 
         matches
             .into_iter()
@@ -1128,9 +1189,7 @@ fn cursor_style_for_mode(mode: PromptEditMode) -> crossterm::cursor::SetCursorSt
 }
 
 fn set_cursor_style_for_mode(mode: PromptEditMode) {
-    use std::io::{IsTerminal, stdout};
-
-    let mut out = stdout();
+    let mut out = std::io::stdout();
     if !out.is_terminal() {
         return;
     }
@@ -1265,13 +1324,16 @@ fn add_completion_keybindings(keybindings: &mut Keybindings) {
 }
 
 fn completion_score(candidate: &str, query: &str) -> Option<usize> {
-    let candidate = candidate.to_lowercase();
-    let query = query.to_lowercase();
-    if candidate.starts_with(&query) {
+    let candidate = if candidate.chars().any(char::is_uppercase) {
+        Cow::Owned(candidate.to_lowercase())
+    } else {
+        Cow::Borrowed(candidate)
+    };
+    if candidate.starts_with(query) {
         return Some(0);
     }
 
-    fuzzy_subsequence_score(&candidate, &query).map(|score| score + 1_000)
+    fuzzy_subsequence_score(&candidate, query).map(|score| score + 1_000)
 }
 
 fn fuzzy_subsequence_score(candidate: &str, query: &str) -> Option<usize> {
@@ -1290,6 +1352,21 @@ fn fuzzy_subsequence_score(candidate: &str, query: &str) -> Option<usize> {
 mod tests {
     use super::*;
 
+    #[test]
+    fn model_listings_skip_malformed_entries() {
+        let openai = serde_json::from_str::<OpenAiModelList>(
+            r#"{"data": [{"id": "gpt-5"}, {"id": 7}, {"object": "model"}, "junk", {"id": "o3"}]}"#,
+        )
+        .expect("openai listing");
+        let ollama = serde_json::from_str::<OllamaModelList>(
+            r#"{"models": [{"name": null}, {"name": "llama3"}, 42]}"#,
+        )
+        .expect("ollama listing");
+
+        assert_eq!(openai_model_ids(openai), ["openai:gpt-5", "openai:o3"]);
+        assert_eq!(ollama_model_names(ollama), ["ollama:llama3"]);
+    }
+
     #[test]
     fn parses_requested_short_flags() {
         let args = Args::parse_from(["agent", "-l", "-u", "-r", "session-id"]);
@@ -1594,6 +1671,30 @@ mod completion_input_tests {
         );
     }
 
+    #[test]
+    fn prompt_completer_loads_session_labels_on_first_completion() {
+        let temp = tempfile::tempdir().expect("temp dir");
+        let store = SessionStore::with_root(temp.path().join(".agent"));
+        let mut completer = AgentCompleter::for_prompt(&store, Arc::new(RwLock::new(Vec::new())));
+        store
+            .save(&Session::new(
+                "later".to_string(),
+                vec![AgentMessage::User {
+                    content: "saved after prompt".to_string(),
+                }],
+            ))
+            .expect("save session");
+
+        let values = completer
+            .complete("/resume", 7)
+            .into_iter()
+            .map(|suggestion| suggestion.value)
+            .collect::<Vec<_>>();
+
+        assert!(values.contains(&"/resume later\tsaved after prompt".to_string()));
+        assert!(values.contains(&"/resume latest".to_string()));
+    }
+
     #[test]
     fn completer_picks_up_background_model_refreshes() {
         let dynamic_models = Arc::new(RwLock::new(Vec::new()));
@@ -1,6 +1,9 @@
-use std::collections::HashMap;
+use std::borrow::Cow;
+use std::collections::{HashMap, VecDeque};
+use std::fmt::Write as _;
+use std::hash::{DefaultHasher, Hash, Hasher};
 use std::io::{self, IsTerminal, Write};
-use std::sync::Mutex;
+use std::sync::{Mutex, OnceLock};
 
 use crate::agent::{AgentMessage, ToolCall, ToolResult, ToolStatus};
 
@@ -14,17 +17,81 @@ const RED: &str = "\x1b[31m";
 const PANEL_MIN_WIDTH: usize = 42;
 const PANEL_MAX_WIDTH: usize = 120;
 const PANEL_PADDING: usize = 2;
+const PREVIEW_CACHE_CAPACITY: usize = 256;
+const PREVIEW_CACHE_MAX_CONTENT_BYTES: usize = 64 * 1024;
+const PREVIEW_CACHE_MAX_BYTES: usize = 2 * 1024 * 1024;
+const PREVIEW_MAX_LINES: usize = 30;
+const DIFF_MARKER: &str = "\nDiff:\n";
 
 #[derive(Clone, Debug)]
 struct ActiveToolCall {
-    call: ToolCall,
-    rendered_line_count: Option<usize>,
+    id: String,
+    body: Vec<String>,
+    rendered_panel: Option<String>,
+}
+
+#[derive(Debug, Default)]
+struct PreviewCache {
+    entries: HashMap<u64, CachedPreview>,
+    order: VecDeque<u64>,
+    total_bytes: usize,
+}
+
+#[derive(Debug)]
+struct CachedPreview {
+    name: String,
+    content: String,
+    lines: Vec<String>,
+}
+
+impl PreviewCache {
+    fn get(&self, key: u64, name: &str, content: &str) -> Option<Vec<String>> {
+        self.entries
+            .get(&key)
+            .filter(|entry| entry.name == name && entry.content == content)
+            .map(|entry| entry.lines.clone())
+    }
+
+    fn insert(&mut self, key: u64, name: &str, content: &str, lines: Vec<String>) {
+        if let Some(previous) = self.entries.remove(&key) {
+            self.total_bytes -= previous.content.len();
+            self.order.retain(|cached_key| *cached_key != key);
+        }
+        while (self.entries.len() >= PREVIEW_CACHE_CAPACITY
+            || self.total_bytes + content.len() > PREVIEW_CACHE_MAX_BYTES)
+            && let Some(oldest) = self.order.pop_front()
+        {
+            if let Some(evicted) = self.entries.remove(&oldest) {
+                self.total_bytes -= evicted.content.len();
+            }
+        }
+        self.total_bytes += content.len();
+        self.order.push_back(key);
+        self.entries.insert(
+            key,
+            CachedPreview {
+                name: name.to_string(),
+                content: content.to_string(),
+                lines,
+            },
+        );
+    }
+}
+
+fn preview_cache_key(name: &str, content: &str) -> u64 {
+    let mut hasher = DefaultHasher::new();
+    name.hash(&mut hasher);
+    content.hash(&mut hasher);
+    hasher.finish()
 }
 
 #[derive(Debug)]
 pub struct TerminalDisplay {
     live_enabled: bool,
-    active_calls: Mutex<HashMap<String, ActiveToolCall>>,
+    stdout_is_terminal: bool,
+    fixed_panel_width_limit: Option<usize>,
+    active_calls: Mutex<Vec<ActiveToolCall>>,
+    preview_cache: Mutex<PreviewCache>,
 }
 
 impl Default for TerminalDisplay {
@@ -35,9 +102,13 @@ impl Default for TerminalDisplay {
 
 impl TerminalDisplay {
     pub fn new() -> Self {
+        let stdout_is_terminal = io::stdout().is_terminal();
         Self {
             live_enabled: std::env::var("AGENT_NO_LIVE").ok().as_deref() != Some("1"),
-            active_calls: Mutex::new(HashMap::new()),
+            stdout_is_terminal,
+            fixed_panel_width_limit: (!stdout_is_terminal).then(panel_width_limit),
+            active_calls: Mutex::new(Vec::new()),
+            preview_cache: Mutex::new(PreviewCache::default()),
         }
     }
 
@@ -51,56 +122,84 @@ impl TerminalDisplay {
     }
 
     pub fn render_new_message(&self, message: &AgentMessage) {
+        let _ = self.write_new_message(&mut io::stdout().lock(), message);
+    }
+
+    pub fn write_new_message(
+        &self,
+        out: &mut impl Write,
+        message: &AgentMessage,
+    ) -> io::Result<()> {
         match message {
-            AgentMessage::System { .. } | AgentMessage::Tool(_) => {}
-            AgentMessage::User { content } => {
-                println!("\n{content}\n");
-            }
+            AgentMessage::System { .. } | AgentMessage::Tool(_) => Ok(()),
+            AgentMessage::User { content } => writeln!(out, "\n{content}\n"),
             AgentMessage::UserWithImages { content, images } => {
-                println!("\n{content}\n[attached {} image(s)]\n", images.len());
+                writeln!(out, "\n{content}\n[attached {} image(s)]\n", images.len())
             }
             AgentMessage::Assistant(assistant) => {
-                if !assistant.content.trim().is_empty() {
-                    println!("\n{}", self.format_assistant_content(&assistant.content));
+                if assistant.content.trim().is_empty() {
+                    return Ok(());
                 }
+                writeln!(
+                    out,
+                    "\n{}",
+                    self.format_assistant_content(&assistant.content)
+                )
             }
         }
     }
 
     pub fn render_tool_result(&self, result: &ToolResult) {
-        let active = self
+        let (body, replaced_panels) = self
             .active_calls
             .lock()
             .ok()
-            .and_then(|mut calls| calls.remove(&result.tool_call_id));
-        let rendered =
-            self.format_tool_result_with_call(result, active.as_ref().map(|active| &active.call));
-        if self.live_enabled
-            && io::stdout().is_terminal()
-            && let Some(line_count) = active.and_then(|active| active.rendered_line_count)
-        {
-            print!("{}", clear_rendered_lines(line_count));
+            .and_then(|mut calls| {
+                let index = calls
+                    .iter()
+                    .position(|active| active.id == result.tool_call_id)?;
+                let active = calls.remove(index);
+                let replaced_panels = active.rendered_panel.map(|panel| {
+                    let later_panels = calls[index..]
+                        .iter()
+                        .filter_map(|later| later.rendered_panel.as_deref())
+                        .collect::<String>();
+                    (panel, later_panels)
+                });
+                Some((active.body, replaced_panels))
+            })
+            .unwrap_or_default();
+        let rendered = self.format_tool_result_with_body(result, || body);
+        let mut stdout = io::stdout().lock();
+        if let Some((panel, later_panels)) = &replaced_panels {
+            let line_count = rendered_line_count(panel) + rendered_line_count(later_panels);
+            let _ = stdout.write_all(clear_rendered_lines(line_count).as_bytes());
         }
-        print!("{rendered}");
-        flush_stdout();
+        let _ = stdout.write_all(rendered.as_bytes());
+        if let Some((_, later_panels)) = &replaced_panels {
+            let _ = stdout.write_all(later_panels.as_bytes());
+        }
+        let _ = stdout.flush();
     }
 
     pub fn render_tool_start(&self, call: &ToolCall) {
-        let rendered = self.live_enabled.then(|| self.format_tool_start(call));
-        let rendered_line_count = rendered.as_deref().map(rendered_line_count);
-        if let Ok(mut calls) = self.active_calls.lock() {
-            calls.insert(
-                call.id.clone(),
-                ActiveToolCall {
-                    call: call.clone(),
-                    rendered_line_count,
-                },
-            );
-        }
-        if let Some(rendered) = rendered {
+        let body = tool_call_body(call);
+        let rendered = self.live_enabled.then(|| {
+            let title = tool_title(&call.name, VisualToolStatus::Running);
+            format_panel(&title, &body, self.panel_width_limit())
+        });
+        if let Some(rendered) = &rendered {
             print!("{rendered}");
             flush_stdout();
         }
+        if let Ok(mut calls) = self.active_calls.lock() {
+            calls.retain(|active| active.id != call.id);
+            calls.push(ActiveToolCall {
+                id: call.id.clone(),
+                body,
+                rendered_panel: rendered.filter(|_| self.stdout_is_terminal),
+            });
+        }
     }
 
     pub fn format_assistant_content(&self, content: &str) -> String {
@@ -110,7 +209,7 @@ impl TerminalDisplay {
     pub fn format_tool_start(&self, call: &ToolCall) -> String {
         let title = tool_title(&call.name, VisualToolStatus::Running);
         let body = tool_call_body(call);
-        format_panel(&title, &body)
+        format_panel(&title, &body, self.panel_width_limit())
     }
 
     pub fn format_tool_result(&self, result: &ToolResult) -> String {
@@ -139,27 +238,73 @@ impl TerminalDisplay {
     }
 
     fn format_tool_result_with_call(&self, result: &ToolResult, call: Option<&ToolCall>) -> String {
+        self.format_tool_result_with_body(result, || call.map(tool_call_body).unwrap_or_default())
+    }
+
+    fn format_tool_result_with_body(
+        &self,
+        result: &ToolResult,
+        body: impl FnOnce() -> Vec<String>,
+    ) -> String {
         if result.name == "communicate" {
-            let elapsed = result
-                .elapsed_ms
-                .map(|elapsed_ms| format!(" ({})", format_elapsed(elapsed_ms)))
-                .unwrap_or_default();
-            return format!("{DIM}{ITALIC}{}{elapsed}{RESET}\n", result.content.trim());
+            return format_communication(result);
         }
 
-        let exit_code = extract_shell_exit_code(&result.name, &result.content);
+        let (content, exit_code) = split_shell_exit_code(&result.name, &result.content);
         let visual_status = visual_status(result.status.clone(), exit_code);
         let title = tool_result_title(&result.name, visual_status, result.elapsed_ms);
-        let mut body = call.map(tool_call_body).unwrap_or_default();
-        let mut result_content = remove_shell_exit_code_marker(&result.name, &result.content);
-        result_content = format_tool_content(&result.name, &result_content);
-        if !result_content.trim().is_empty() {
-            body.extend(preview_lines(&result_content));
-        }
+        let mut body = body();
+        body.extend(self.result_preview(&result.name, content));
         if body.is_empty() {
             body.push(styled(DIM, ""));
         }
-        format_panel(&title, &body)
+        format_panel(&title, &body, self.panel_width_limit())
+    }
+
+    fn panel_width_limit(&self) -> usize {
+        self.fixed_panel_width_limit
+            .unwrap_or_else(panel_width_limit)
+    }
+
+    fn result_preview(&self, name: &str, content: &str) -> Vec<String> {
+        if content.trim().is_empty() {
+            return Vec::new();
+        }
+        if content.len() > PREVIEW_CACHE_MAX_CONTENT_BYTES {
+            return extract_result_preview(name, content);
+        }
+
+        let key = preview_cache_key(name, content);
+        if let Ok(cache) = self.preview_cache.lock()
+            && let Some(lines) = cache.get(key, name, content)
+        {
+            return lines;
+        }
+
+        let lines = extract_result_preview(name, content);
+        if let Ok(mut cache) = self.preview_cache.lock() {
+            cache.insert(key, name, content, lines.clone());
+        }
+        lines
+    }
+}
+
+fn format_communication(result: &ToolResult) -> String {
+    let mut out = format!("{DIM}{ITALIC}{}", result.content.trim());
+    if let Some(elapsed_ms) = result.elapsed_ms {
+        let _ = write!(out, " ({})", format_elapsed(elapsed_ms));
+    }
+    out.push_str(RESET);
+    out.push('\n');
+    out
+}
+
+fn extract_result_preview(name: &str, content: &str) -> Vec<String> {
+    let result_content = format_tool_content(name, content);
+    if result_content.trim().is_empty() {
+        Vec::new()
+    } else {
+        preview_lines(&result_content)
     }
 }
 
@@ -181,19 +326,20 @@ fn visual_status(status: ToolStatus, exit_code: Option<i32>) -> VisualToolStatus
 }
 
 fn tool_title(name: &str, status: VisualToolStatus) -> String {
-    let status_text = match status {
-        VisualToolStatus::Running => styled(CYAN, "[> Running]"),
-        VisualToolStatus::Done => styled(GREEN, "[OK Done]"),
-        VisualToolStatus::Error(Some(code)) => styled(RED, &format!("[ERR Done ({code})]")),
-        VisualToolStatus::Error(None) => styled(RED, "[ERR Done]"),
-    };
-    format!("{}  {status_text}", styled(CYAN, name))
+    match status {
+        VisualToolStatus::Running => format!("{CYAN}{name}{RESET}  {CYAN}[> Running]{RESET}"),
+        VisualToolStatus::Done => format!("{CYAN}{name}{RESET}  {GREEN}[OK Done]{RESET}"),
+        VisualToolStatus::Error(Some(code)) => {
+            format!("{CYAN}{name}{RESET}  {RED}[ERR Done ({code})]{RESET}")
+        }
+        VisualToolStatus::Error(None) => format!("{CYAN}{name}{RESET}  {RED}[ERR Done]{RESET}"),
+    }
 }
 
 fn tool_result_title(name: &str, status: VisualToolStatus, elapsed_ms: Option<u64>) -> String {
     let mut title = tool_title(name, status);
     if let Some(elapsed_ms) = elapsed_ms {
-        title.push_str(&format!("  {}", styled(DIM, &format_elapsed(elapsed_ms))));
+        let _ = write!(title, "  {DIM}{}{RESET}", format_elapsed(elapsed_ms));
     }
     title
 }
@@ -209,148 +355,128 @@ fn format_elapsed(elapsed_ms: u64) -> String {
 }
 
 fn tool_call_body(call: &ToolCall) -> Vec<String> {
-    format_args_lines(call)
-        .into_iter()
-        .map(|line| styled(DIM, &line))
-        .collect()
-}
-
-fn format_args_lines(call: &ToolCall) -> Vec<String> {
     let Some(args) = call.arguments.as_object() else {
         return Vec::new();
     };
-    if args.is_empty() {
-        return Vec::new();
-    }
 
-    let mut lines = Vec::new();
+    let mut lines = Vec::with_capacity(args.len());
     for (key, value) in args {
         let rendered = match value {
-            serde_json::Value::String(value) => value.clone(),
-            other => other.to_string(),
+            serde_json::Value::String(value) => Cow::Borrowed(value.as_str()),
+            other => Cow::Owned(other.to_string()),
         };
         let mut rendered_lines = rendered.lines();
-        if let Some(first) = rendered_lines.next() {
-            lines.push(format!("{key}={first}"));
-            lines.extend(rendered_lines.map(str::to_string));
-        } else {
-            lines.push(format!("{key}="));
-        }
+        let first = rendered_lines.next().unwrap_or_default();
+        lines.push(format!("{DIM}{key}={first}{RESET}"));
+        lines.extend(rendered_lines.map(|line| styled(DIM, line)));
     }
     lines
 }
 
-fn format_tool_content(name: &str, content: &str) -> String {
-    if content.contains("\nDiff:\n") {
-        return color_diff(content);
-    }
-    if name == "read_file" {
-        return highlight_read_file(content).unwrap_or_else(|| content.to_string());
-    }
-    content.to_string()
+fn format_tool_content<'a>(name: &str, content: &'a str) -> Cow<'a, str> {
+    let formatted = match name {
+        "read_file" => highlight_read_file(content),
+        "write_file" | "search_replace" => color_diff_section(content),
+        _ => None,
+    };
+    formatted.map_or(Cow::Borrowed(content), Cow::Owned)
+}
+
+fn color_diff_section(content: &str) -> Option<String> {
+    let index = content.find(DIFF_MARKER)?;
+    let (summary, diff) = content.split_at(index + DIFF_MARKER.len());
+    let mut out = String::with_capacity(content.len() + 64);
+    out.push_str(summary);
+    push_colored_diff(&mut out, diff);
+    Some(out)
 }
 
 fn preview_lines(content: &str) -> Vec<String> {
-    let lines = content.lines().collect::<Vec<_>>();
-    let mut out = Vec::new();
-    for line in lines.iter().take(30) {
-        out.push((*line).to_string());
-    }
-    if lines.len() > 30 {
+    let mut lines = content.lines();
+    let mut out = lines
+        .by_ref()
+        .take(PREVIEW_MAX_LINES)
+        .map(str::to_string)
+        .collect::<Vec<_>>();
+    if lines.next().is_some() {
         out.push(styled(DIM, "..."));
     }
     out
 }
 
-fn format_panel(title: &str, body: &[String]) -> String {
-    let content_width = panel_content_width(title, body);
+fn format_panel(title: &str, body: &[String], width_limit: usize) -> String {
+    let empty = [String::new()];
+    let body_lines = if body.is_empty() { &empty[..] } else { body };
+    let line_widths = body_lines
+        .iter()
+        .map(|line| visible_width(line))
+        .collect::<Vec<_>>();
+    let body_width = line_widths.iter().copied().max().unwrap_or(0);
+    let content_width = panel_content_width(title, body_width, width_limit);
     let panel_width = content_width + PANEL_PADDING * 2 + 2;
-    let title_prefix = format!("{}╭─ {title} ", GREY);
     let top_fill = panel_width
-        .saturating_sub(visible_width(&title_prefix))
+        .saturating_sub(visible_width(title) + 4)
         .saturating_sub(1);
 
     let mut out = String::new();
-    out.push('\n');
-    out.push_str(&title_prefix);
-    out.push_str(&"─".repeat(top_fill));
-    out.push_str(&format!("╮{RESET}\n"));
+    let _ = writeln!(out, "\n{GREY}╭─ {title} {:─<top_fill$}╮{RESET}", "");
 
-    let body_lines = if body.is_empty() {
-        vec![String::new()]
-    } else {
-        body.to_vec()
-    };
-    for line in body_lines {
-        for line in wrap_visible(&line, content_width) {
-            let padding = content_width.saturating_sub(visible_width(&line));
-            out.push_str(&format!(
-                "{GREY}│{RESET}{}{line}{}{}{GREY}│{RESET}\n",
-                " ".repeat(PANEL_PADDING),
-                " ".repeat(padding),
-                " ".repeat(PANEL_PADDING)
-            ));
+    for (line, width) in body_lines.iter().zip(line_widths) {
+        if width <= content_width {
+            push_panel_row(&mut out, line, content_width - width);
+            continue;
+        }
+        for line in wrap_visible(line, content_width) {
+            let fill = content_width.saturating_sub(visible_width(&line));
+            push_panel_row(&mut out, &line, fill);
         }
     }
 
-    out.push_str(&format!(
-        "{GREY}╰{}╯{RESET}\n",
-        "─".repeat(panel_width.saturating_sub(2))
-    ));
+    let bottom_fill = panel_width.saturating_sub(2);
+    let _ = writeln!(out, "{GREY}╰{:─<bottom_fill$}╯{RESET}", "");
     out
 }
 
-fn panel_content_width(title: &str, body: &[String]) -> usize {
-    let terminal_max = crossterm::terminal::size()
+fn push_panel_row(out: &mut String, line: &str, fill: usize) {
+    let padding = PANEL_PADDING;
+    let _ = writeln!(
+        out,
+        "{GREY}│{RESET}{:padding$}{line}{:fill$}{:padding$}{GREY}│{RESET}",
+        "", "", ""
+    );
+}
+
+fn panel_width_limit() -> usize {
+    crossterm::terminal::size()
         .ok()
         .map(|(width, _)| (width as usize).saturating_sub(4))
         .unwrap_or(PANEL_MAX_WIDTH)
-        .clamp(PANEL_MIN_WIDTH, PANEL_MAX_WIDTH);
+        .clamp(PANEL_MIN_WIDTH, PANEL_MAX_WIDTH)
+}
+
+fn panel_content_width(title: &str, body_width: usize, width_limit: usize) -> usize {
     let title_width = visible_width(title).saturating_add(2);
-    let body_width = body
-        .iter()
-        .map(|line| visible_width(line))
-        .max()
-        .unwrap_or(0);
     title_width
         .max(body_width)
         .max(PANEL_MIN_WIDTH - PANEL_PADDING * 2 - 2)
-        .min(terminal_max - PANEL_PADDING * 2 - 2)
+        .min(width_limit - PANEL_PADDING * 2 - 2)
 }
 
 fn styled(style: &str, text: &str) -> String {
     format!("{style}{text}{RESET}")
 }
 
-fn extract_shell_exit_code(name: &str, content: &str) -> Option<i32> {
-    if name == "run_shell_command" {
-        extract_exit_code(content)
-    } else {
-        None
-    }
-}
-
-fn extract_exit_code(content: &str) -> Option<i32> {
-    let marker = "(exit code:";
-    let rest = content.split_once(marker)?.1;
-    let code = rest.split_once(')')?.0.trim();
-    code.parse::<i32>().ok()
-}
-
-fn remove_shell_exit_code_marker(name: &str, content: &str) -> String {
-    if name == "run_shell_command" {
-        remove_exit_code_marker(content)
-    } else {
-        content.to_string()
-    }
-}
-
-fn remove_exit_code_marker(content: &str) -> String {
-    if let Some((before, _)) = content.split_once("(exit code:") {
-        before.trim_end().to_string()
-    } else {
-        content.to_string()
+fn split_shell_exit_code<'a>(name: &str, content: &'a str) -> (&'a str, Option<i32>) {
+    if name != "run_shell_command" {
+        return (content, None);
     }
+    let Some((before, rest)) = content.rsplit_once("(exit code:") else {
+        return (content, None);
+    };
+    let code = rest
+        .split_once(')')
+        .and_then(|(code, _)| code.trim().parse::<i32>().ok());
+    (before.trim_end(), code)
 }
 
 fn rendered_line_count(rendered: &str) -> usize {
@@ -362,11 +488,24 @@ fn clear_rendered_lines(line_count: usize) -> String {
 }
 
 fn visible_width(text: &str) -> usize {
-    strip_ansi(text).chars().count()
+    let mut width = 0;
+    let mut chars = text.chars();
+    while let Some(ch) = chars.next() {
+        if ch == '\x1b' {
+            for next in chars.by_ref() {
+                if next == 'm' {
+                    break;
+                }
+            }
+        } else {
+            width += 1;
+        }
+    }
+    width
 }
 
 fn wrap_visible(text: &str, max_width: usize) -> Vec<String> {
-    if max_width == 0 || visible_width(text) <= max_width {
+    if max_width == 0 {
         return vec![text.to_string()];
     }
 
@@ -403,23 +542,6 @@ fn wrap_visible(text: &str, max_width: usize) -> Vec<String> {
     out
 }
 
-fn strip_ansi(text: &str) -> String {
-    let mut out = String::new();
-    let mut chars = text.chars().peekable();
-    while let Some(ch) = chars.next() {
-        if ch == '\x1b' {
-            for next in chars.by_ref() {
-                if next == 'm' {
-                    break;
-                }
-            }
-        } else {
-            out.push(ch);
-        }
-    }
-    out
-}
-
 fn flush_stdout() {
     let _ = io::stdout().flush();
 }
@@ -464,13 +586,18 @@ struct ActiveMarkdownCodeBlock {
 }
 
 fn render_markdown_with_termimad(content: &str) -> String {
-    format!("{}", termimad::MadSkin::default_dark().term_text(content))
+    static SKIN: OnceLock<termimad::MadSkin> = OnceLock::new();
+    let skin = SKIN.get_or_init(termimad::MadSkin::default_dark);
+    format!("{}", skin.term_text(content))
 }
 
 fn markdown_code_blocks(content: &str) -> Vec<MarkdownCodeBlock> {
     use pulldown_cmark::{CodeBlockKind, Event, Options, Parser, Tag, TagEnd};
 
     let mut blocks = Vec::new();
+    if !may_contain_code_block(content) {
+        return blocks;
+    }
     let mut active: Option<ActiveMarkdownCodeBlock> = None;
 
     for (event, range) in Parser::new_ext(content, Options::all()).into_offset_iter() {
@@ -513,6 +640,13 @@ fn markdown_code_blocks(content: &str) -> Vec<MarkdownCodeBlock> {
     blocks
 }
 
+fn may_contain_code_block(content: &str) -> bool {
+    content.contains("```")
+        || content.contains("~~~")
+        || content.contains("    ")
+        || content.contains('\t')
+}
+
 fn format_highlighted_code_block(language: &str, code: &str) -> String {
     let highlighted = highlight_code(code, language).unwrap_or_else(|| code.to_string());
     let mut out = String::new();
@@ -524,8 +658,22 @@ fn format_highlighted_code_block(language: &str, code: &str) -> String {
     out
 }
 
+fn syntax_set() -> &'static syntect::parsing::SyntaxSet {
+    static SYNTAX_SET: OnceLock<syntect::parsing::SyntaxSet> = OnceLock::new();
+    SYNTAX_SET.get_or_init(syntect::parsing::SyntaxSet::load_defaults_newlines)
+}
+
+fn code_theme() -> Option<&'static syntect::highlighting::Theme> {
+    static THEME_SET: OnceLock<syntect::highlighting::ThemeSet> = OnceLock::new();
+    let theme_set = THEME_SET.get_or_init(syntect::highlighting::ThemeSet::load_defaults);
+    theme_set
+        .themes
+        .get("base16-ocean.dark")
+        .or_else(|| theme_set.themes.values().next())
+}
+
 fn highlight_code(code: &str, language: &str) -> Option<String> {
-    let syntax_set = syntect::parsing::SyntaxSet::load_defaults_newlines();
+    let syntax_set = syntax_set();
     let syntax = if language.is_empty() {
         syntax_set.find_syntax_plain_text()
     } else {
@@ -534,7 +682,7 @@ fn highlight_code(code: &str, language: &str) -> Option<String> {
             .or_else(|| syntax_set.find_syntax_by_extension(language))
             .unwrap_or_else(|| syntax_set.find_syntax_plain_text())
     };
-    highlight_with_syntax_set(code, syntax, &syntax_set)
+    highlight_with_syntax_set(code, syntax, syntax_set)
 }
 
 fn highlight_with_syntax_set(
@@ -542,11 +690,7 @@ fn highlight_with_syntax_set(
     syntax: &syntect::parsing::SyntaxReference,
     syntax_set: &syntect::parsing::SyntaxSet,
 ) -> Option<String> {
-    let theme_set = syntect::highlighting::ThemeSet::load_defaults();
-    let theme = theme_set
-        .themes
-        .get("base16-ocean.dark")
-        .or_else(|| theme_set.themes.values().next())?;
+    let theme = code_theme()?;
     let mut highlighter = syntect::easy::HighlightLines::new(syntax, theme);
     let mut out = String::new();
     for line in syntect::util::LinesWithEndings::from(code) {
@@ -559,37 +703,142 @@ fn highlight_with_syntax_set(
     Some(out)
 }
 
-fn color_diff(content: &str) -> String {
-    content
-        .lines()
-        .map(|line| {
-            if line.starts_with('+') && !line.starts_with("+++") {
-                format!("\x1b[32m{line}\x1b[0m")
-            } else if line.starts_with('-') && !line.starts_with("---") {
-                format!("\x1b[31m{line}\x1b[0m")
-            } else if line.starts_with("@@") {
-                format!("\x1b[36m{line}\x1b[0m")
-            } else {
-                line.to_string()
-            }
-        })
-        .collect::<Vec<_>>()
-        .join("\n")
+fn push_colored_diff(out: &mut String, diff: &str) {
+    for (index, line) in diff.lines().enumerate() {
+        if index > 0 {
+            out.push('\n');
+        }
+        let color = if line.starts_with('+') && !line.starts_with("+++") {
+            "\x1b[32m"
+        } else if line.starts_with('-') && !line.starts_with("---") {
+            "\x1b[31m"
+        } else if line.starts_with("@@") {
+            "\x1b[36m"
+        } else {
+            out.push_str(line);
+            continue;
+        };
+        out.push_str(color);
+        out.push_str(line);
+        out.push_str("\x1b[0m");
+    }
 }
 
 fn highlight_read_file(content: &str) -> Option<String> {
-    let (header, body) = content.split_once('\n')?;
+    let (header, body) = content
+        .split_once('\n')
+        .filter(|(_, body)| !body.is_empty())?;
     let path = header.strip_prefix("[FILE]: ")?.trim();
     let extension = std::path::Path::new(path)
         .extension()
         .and_then(|extension| extension.to_str());
-    let syntax_set = syntect::parsing::SyntaxSet::load_defaults_newlines();
+    let syntax_set = syntax_set();
     let syntax = extension
         .and_then(|extension| syntax_set.find_syntax_by_extension(extension))
         .unwrap_or_else(|| syntax_set.find_syntax_plain_text());
-    let mut out = String::new();
+    let preview_end = body
+        .match_indices('\n')
+        .nth(PREVIEW_MAX_LINES - 1)
+        .map_or(body.len(), |(index, _)| index + 1);
+    let (preview, rest) = body.split_at(preview_end);
+    let mut out = String::with_capacity(content.len() + preview.len());
     out.push_str(header);
     out.push('\n');
-    out.push_str(&highlight_with_syntax_set(body, syntax, &syntax_set)?);
+    out.push_str(&highlight_with_syntax_set(preview, syntax, syntax_set)?);
+    out.push_str(rest);
     Some(out)
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn result_preview_serves_repeated_output_from_cache() {
+        let display = TerminalDisplay::new();
+        let content = "[FILE]: ./main.rs\nfn main() {}\n";
+        let key = preview_cache_key("read_file", content);
+        display.preview_cache.lock().unwrap().insert(
+            key,
+            "read_file",
+            content,
+            vec!["cached".to_string()],
+        );
+
+        assert_eq!(display.result_preview("read_file", content), ["cached"]);
+        assert_ne!(
+            display.result_preview("run_shell_command", content),
+            ["cached"]
+        );
+    }
+
+    #[test]
+    fn result_preview_populates_cache_on_miss() {
+        let display = TerminalDisplay::new();
+        let content = "line one\nline two\n";
+
+        let lines = display.result_preview("run_shell_command", content);
+
+        let key = preview_cache_key("run_shell_command", content);
+        let cache = display.preview_cache.lock().unwrap();
+        assert_eq!(cache.get(key, "run_shell_command", content), Some(lines));
+    }
+
+    #[test]
+    fn preview_cache_misses_when_key_collides_with_different_content() {
+        let mut cache = PreviewCache::default();
+        cache.insert(7, "read_file", "first", vec!["first".to_string()]);
+
+        assert_eq!(
+            cache.get(7, "read_file", "first"),
+            Some(vec!["first".to_string()])
+        );
+        assert_eq!(cache.get(7, "read_file", "second"), None);
+        assert_eq!(cache.get(7, "run_shell_command", "first"), None);
+    }
+
+    #[test]
+    fn preview_cache_evicts_oldest_entry_at_capacity() {
+        let mut cache = PreviewCache::default();
+        for key in 0..=PREVIEW_CACHE_CAPACITY as u64 {
+            cache.insert(key, "fetch", &key.to_string(), Vec::new());
+        }
+
+        assert_eq!(cache.entries.len(), PREVIEW_CACHE_CAPACITY);
+        assert_eq!(cache.get(0, "fetch", "0"), None);
+        assert!(
+            cache
+                .get(
+                    PREVIEW_CACHE_CAPACITY as u64,
+                    "fetch",
+                    &PREVIEW_CACHE_CAPACITY.to_string()
+                )
+                .is_some()
+        );
+    }
+
+    #[test]
+    fn preview_cache_evicts_oldest_entries_past_byte_budget() {
+        let mut cache = PreviewCache::default();
+        let content = "x".repeat(PREVIEW_CACHE_MAX_CONTENT_BYTES);
+        let entries = PREVIEW_CACHE_MAX_BYTES / PREVIEW_CACHE_MAX_CONTENT_BYTES;
+        for key in 0..=entries as u64 {
+            cache.insert(key, "fetch", &content, Vec::new());
+        }
+
+        assert_eq!(cache.entries.len(), entries);
+        assert_eq!(cache.total_bytes, PREVIEW_CACHE_MAX_BYTES);
+        assert_eq!(cache.get(0, "fetch", &content), None);
+        assert!(cache.get(entries as u64, "fetch", &content).is_some());
+    }
+
+    #[test]
+    fn result_preview_skips_cache_for_large_output() {
+        let display = TerminalDisplay::new();
+        let content = "x".repeat(PREVIEW_CACHE_MAX_CONTENT_BYTES + 1);
+
+        display.result_preview("run_shell_command", &content);
+
+        assert!(display.preview_cache.lock().unwrap().entries.is_empty());
+    }
+}
@@ -5,30 +5,40 @@ use std::path::{Path, PathBuf};
 const MAX_IMPORT_DEPTH: usize = 5;
 
 pub fn load_all_agents_memory(start_dir: Option<&Path>) -> String {
-    find_all_agents_md_files(start_dir)
+    load_agents_memory(agents_md_candidates(start_dir))
+}
+
+fn load_agents_memory(candidates: Vec<PathBuf>) -> String {
+    let mut seen = HashSet::new();
+    candidates
         .into_iter()
-        .filter_map(|path| read_agents_md(&path, 0, &mut HashSet::new()).ok())
+        .filter_map(|path| {
+            let mut candidate_seen = seen.clone();
+            let content = read_agents_md(&path, 0, &mut candidate_seen).ok()?;
+            seen = candidate_seen;
+            Some(content)
+        })
         .filter(|content| !content.is_empty())
         .collect::<Vec<_>>()
         .join("\n\n")
 }
 
 pub fn find_all_agents_md_files(start_dir: Option<&Path>) -> Vec<PathBuf> {
-    let mut files = Vec::new();
+    agents_md_candidates(start_dir)
+        .into_iter()
+        .filter(|path| path.is_file())
+        .collect()
+}
+
+fn agents_md_candidates(start_dir: Option<&Path>) -> Vec<PathBuf> {
     let start = start_dir
         .map(Path::to_path_buf)
         .unwrap_or_else(|| std::env::current_dir().unwrap_or_else(|_| PathBuf::from(".")));
-    let project = start.join("AGENTS.md");
-    if project.is_file() {
-        files.push(project);
-    }
+    let mut candidates = vec![start.join("AGENTS.md")];
     if let Some(home) = dirs::home_dir() {
-        let user = home.join(".agent").join("AGENTS.md");
-        if user.is_file() {
-            files.push(user);
-        }
+        candidates.push(home.join(".agent").join("AGENTS.md"));
     }
-    files
+    candidates
 }
 
 fn read_agents_md(
@@ -47,9 +57,14 @@ fn read_agents_md(
     seen.insert(path.clone());
 
     let content = fs::read_to_string(&path)?;
+    let import_paths = parse_import_paths(&content);
+    if import_paths.is_empty() {
+        return Ok(content);
+    }
+
     let base_dir = path.parent().unwrap_or_else(|| Path::new("."));
-    let mut parts = vec![content.clone()];
-    for import_path in parse_import_paths(&content) {
+    let mut parts = vec![content];
+    for import_path in import_paths {
         let resolved = resolve_import(base_dir, &import_path);
         let imported = read_agents_md(&resolved, current_depth + 1, seen)?;
         if !imported.is_empty() {
@@ -60,43 +75,46 @@ fn read_agents_md(
 }
 
 fn parse_import_paths(text: &str) -> Vec<String> {
-    remove_markdown_code(text)
-        .lines()
-        .filter_map(|line| line.trim().strip_prefix('@').map(str::trim))
-        .filter(|path| !path.is_empty())
-        .map(ToOwned::to_owned)
-        .collect()
-}
+    let mut paths = Vec::new();
+    if !text.contains('@') {
+        return paths;
+    }
 
-fn remove_markdown_code(text: &str) -> String {
-    let mut out = String::new();
     let mut in_block = false;
+    let mut stripped = String::new();
     for line in text.lines() {
         if line.trim_start().starts_with("```") {
             in_block = !in_block;
             continue;
         }
-        if !in_block {
-            out.push_str(&remove_inline_code(line));
-            out.push('\n');
+        if in_block {
+            continue;
+        }
+
+        let line = if line.contains('`') {
+            stripped.clear();
+            push_without_inline_code(&mut stripped, line);
+            stripped.as_str()
+        } else {
+            line
+        };
+        if let Some(path) = line.trim().strip_prefix('@').map(str::trim)
+            && !path.is_empty()
+        {
+            paths.push(path.to_string());
         }
     }
-    out
+    paths
 }
 
-fn remove_inline_code(line: &str) -> String {
-    let mut out = String::new();
+fn push_without_inline_code(out: &mut String, line: &str) {
     let mut in_code = false;
-    for ch in line.chars() {
-        if ch == '`' {
-            in_code = !in_code;
-            continue;
-        }
+    for segment in line.split('`') {
         if !in_code {
-            out.push(ch);
+            out.push_str(segment);
         }
+        in_code = !in_code;
     }
-    out
 }
 
 fn resolve_import(base_dir: &Path, import_path: &str) -> PathBuf {
@@ -115,3 +133,39 @@ fn resolve_import(base_dir: &Path, import_path: &str) -> PathBuf {
         base_dir.join(path)
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn failed_candidate_does_not_hide_shared_imports_from_later_candidates() {
+        let temp = tempfile::tempdir().expect("temp dir");
+        fs::write(temp.path().join("shared.md"), "shared rules").expect("write shared");
+        fs::write(temp.path().join("first.md"), "@shared.md\n@missing.md").expect("write first");
+        fs::write(temp.path().join("second.md"), "second\n@shared.md").expect("write second");
+
+        let memory = load_agents_memory(vec![
+            temp.path().join("first.md"),
+            temp.path().join("second.md"),
+        ]);
+
+        assert_eq!(memory, "second\n@shared.md\nshared rules");
+    }
+
+    #[test]
+    fn import_paths_skip_code_blocks_and_inline_code() {
+        let text =
+            "@first.md\n```\n@fenced.md\n```\n`@inline.md`\n  @ second.md  \n@\nnot @an-import\n";
+
+        assert_eq!(parse_import_paths(text), vec!["first.md", "second.md"]);
+    }
+
+    #[test]
+    fn import_paths_keep_text_around_inline_code() {
+        assert_eq!(
+            parse_import_paths("`code` @after-code.md\n@path`with`ticks.md"),
+            vec!["after-code.md", "pathticks.md"]
+        );
+    }
+}
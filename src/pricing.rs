@@ -1,9 +1,10 @@
 use std::collections::HashMap;
 use std::fmt;
 use std::fs;
-use std::io;
+use std::io::{self, Write};
 use std::path::{Path, PathBuf};
-use std::time::Duration;
+use std::sync::{Arc, Mutex, OnceLock};
+use std::time::{Duration, SystemTime};
 
 use serde::{Deserialize, Deserializer};
 use serde_json::Value;
@@ -49,9 +50,24 @@ impl fmt::Display for PricingRefreshReport {
 }
 
 #[derive(Clone, Debug, Deserialize, PartialEq)]
-#[serde(transparent)]
+#[serde(from = "HashMap<String, ModelPricing>")]
 pub struct PricingMap {
     models: HashMap<String, ModelPricing>,
+    aliases: HashMap<String, String>,
+}
+
+impl From<HashMap<String, ModelPricing>> for PricingMap {
+    fn from(models: HashMap<String, ModelPricing>) -> Self {
+        let mut aliases = HashMap::new();
+        for (model, pricing) in &models {
+            for alias in &pricing.aliases {
+                aliases
+                    .entry(alias.clone())
+                    .or_insert_with(|| model.clone());
+            }
+        }
+        Self { models, aliases }
+    }
 }
 
 impl PricingMap {
@@ -74,11 +90,10 @@ impl PricingMap {
             }
         }
 
-        self.models.values().find(|pricing| {
-            pricing
-                .aliases
-                .iter()
-                .any(|alias| candidates.iter().any(|candidate| candidate == alias))
+        candidates.iter().find_map(|candidate| {
+            self.aliases
+                .get(candidate)
+                .and_then(|model| self.models.get(model))
         })
     }
 }
@@ -152,7 +167,10 @@ async fn refresh_pricing_cache_from_url_with_client(
         fs::create_dir_all(parent)?;
     }
     let tmp_path = cache_path.with_extension("json.tmp");
-    fs::write(&tmp_path, format!("{payload}\n"))?;
+    let mut file = fs::File::create(&tmp_path)?;
+    file.write_all(payload.as_bytes())?;
+    file.write_all(b"\n")?;
+    drop(file);
     fs::rename(&tmp_path, &cache_path)?;
 
     Ok(PricingRefreshReport {
@@ -187,11 +205,45 @@ pub fn cost_from_cached_litellm_pricing(raw_model: &str, usage: &Usage) -> Optio
 }
 
 pub fn cost_from_cache_at(root: &Path, raw_model: &str, usage: &Usage) -> Option<f64> {
-    let payload = fs::read_to_string(pricing_cache_path(root)).ok()?;
-    let pricing_map = parse_pricing_map(&payload).ok()?;
+    let pricing_map = cached_pricing_map(&pricing_cache_path(root))?;
     cost_from_pricing_map(&pricing_map, raw_model, usage)
 }
 
+struct CachedPricingMap {
+    path: PathBuf,
+    modified: SystemTime,
+    len: u64,
+    pricing_map: Arc<PricingMap>,
+}
+
+fn cached_pricing_map(path: &Path) -> Option<Arc<PricingMap>> {
+    static CACHE: OnceLock<Mutex<Option<CachedPricingMap>>> = OnceLock::new();
+    let metadata = fs::metadata(path).ok()?;
+    let modified = metadata.modified().ok()?;
+    let len = metadata.len();
+    let mut cache = CACHE
+        .get_or_init(|| Mutex::new(None))
+        .lock()
+        .unwrap_or_else(|err| err.into_inner());
+    if let Some(cached) = cache.as_ref()
+        && cached.path == path
+        && cached.modified == modified
+        && cached.len == len
+    {
+        return Some(Arc::clone(&cached.pricing_map));
+    }
+
+    let payload = fs::read_to_string(path).ok()?;
+    let pricing_map = Arc::new(parse_pricing_map(&payload).ok()?);
+    *cache = Some(CachedPricingMap {
+        path: path.to_path_buf(),
+        modified,
+        len,
+        pricing_map: Arc::clone(&pricing_map),
+    });
+    Some(pricing_map)
+}
+
 pub fn cost_from_pricing_map(
     pricing_map: &PricingMap,
     raw_model: &str,
@@ -1,5 +1,5 @@
 use std::fs;
-use std::io;
+use std::io::{self, BufWriter, Write};
 use std::path::PathBuf;
 
 use uuid::Uuid;
@@ -41,7 +41,11 @@ impl SessionStore {
     }
 
     pub fn ensure_dirs(&self) -> io::Result<()> {
-        fs::create_dir_all(self.sessions_dir())
+        let sessions_dir = self.sessions_dir();
+        if sessions_dir.is_dir() {
+            return Ok(());
+        }
+        fs::create_dir_all(sessions_dir)
     }
 
     pub fn new_session_id(&self) -> String {
@@ -59,12 +63,18 @@ impl SessionStore {
 
         let session_path = self.session_path(&session.session_id);
         let tmp_path = session_path.with_extension("json.tmp");
-        let payload = serde_json::to_string_pretty(session)
+        let mut writer = BufWriter::new(fs::File::create(&tmp_path)?);
+        serde_json::to_writer(&mut writer, session)
             .map_err(|err| io::Error::new(io::ErrorKind::InvalidData, err))?;
-        fs::write(&tmp_path, format!("{payload}\n"))?;
+        writer.write_all(b"\n")?;
+        writer.flush()?;
+        drop(writer);
         fs::rename(tmp_path, session_path)?;
 
         let latest = self.latest_session_path();
+        if fs::read_to_string(&latest).is_ok_and(|current| current.trim() == session.session_id) {
+            return Ok(());
+        }
         let latest_tmp = latest.with_extension("tmp");
         fs::write(&latest_tmp, format!("{}\n", session.session_id))?;
         fs::rename(latest_tmp, latest)?;
@@ -86,16 +96,7 @@ impl SessionStore {
             ));
         }
 
-        let payload = fs::read_to_string(self.session_path(&id))?;
-        let session: Session = serde_json::from_str(&payload)
-            .map_err(|err| io::Error::new(io::ErrorKind::InvalidData, err))?;
-        if session.schema_version != SESSION_SCHEMA_VERSION {
-            return Err(io::Error::new(
-                io::ErrorKind::InvalidData,
-                format!("unsupported session schema: {}", session.schema_version),
-            ));
-        }
-        Ok(session)
+        self.read_session(&id)
     }
 
     pub fn list_session_ids(&self) -> io::Result<Vec<String>> {
@@ -123,29 +124,67 @@ impl SessionStore {
     }
 
     pub fn list_session_labels(&self, max_preview_len: usize) -> io::Result<Vec<String>> {
-        let mut labels = Vec::new();
-        for id in self.list_session_ids()? {
-            let label = match self.load(Some(&id)) {
-                Ok(session) => {
-                    let preview = session.messages.iter().find_map(|message| match message {
-                        crate::agent::AgentMessage::User { content }
-                        | crate::agent::AgentMessage::UserWithImages { content, .. } => {
-                            Some(collapse_preview(content, max_preview_len))
-                        }
-                        _ => None,
-                    });
-                    match preview {
-                        Some(preview) if !preview.is_empty() => format!("{id}\t{preview}"),
-                        _ => id,
-                    }
-                }
-                Err(_) => id,
-            };
-            labels.push(label);
+        let ids = self.list_session_ids()?;
+        if ids.is_empty() {
+            return Ok(Vec::new());
         }
+
+        let workers = std::thread::available_parallelism()
+            .map(usize::from)
+            .unwrap_or(1)
+            .min(ids.len());
+        let chunk_size = ids.len().div_ceil(workers);
+        let labels = std::thread::scope(|scope| {
+            let handles = ids
+                .chunks(chunk_size)
+                .map(|chunk| {
+                    scope.spawn(move || {
+                        chunk
+                            .iter()
+                            .map(|id| self.session_label(id, max_preview_len))
+                            .collect::<Vec<_>>()
+                    })
+                })
+                .collect::<Vec<_>>();
+            handles
+                .into_iter()
+                .zip(ids.chunks(chunk_size))
+                .flat_map(|(handle, chunk)| handle.join().unwrap_or_else(|_| chunk.to_vec()))
+                .collect()
+        });
         Ok(labels)
     }
 
+    fn session_label(&self, id: &str, max_preview_len: usize) -> String {
+        let Ok(session) = self.read_session(id) else {
+            return id.to_string();
+        };
+        let preview = session.messages.iter().find_map(|message| match message {
+            crate::agent::AgentMessage::User { content }
+            | crate::agent::AgentMessage::UserWithImages { content, .. } => {
+                Some(collapse_preview(content, max_preview_len))
+            }
+            _ => None,
+        });
+        match preview {
+            Some(preview) if !preview.is_empty() => format!("{id}\t{preview}"),
+            _ => id.to_string(),
+        }
+    }
+
+    fn read_session(&self, session_id: &str) -> io::Result<Session> {
+        let payload = fs::read_to_string(self.session_path(session_id))?;
+        let session: Session = serde_json::from_str(&payload)
+            .map_err(|err| io::Error::new(io::ErrorKind::InvalidData, err))?;
+        if session.schema_version != SESSION_SCHEMA_VERSION {
+            return Err(io::Error::new(
+                io::ErrorKind::InvalidData,
+                format!("unsupported session schema: {}", session.schema_version),
+            ));
+        }
+        Ok(session)
+    }
+
     fn session_path(&self, session_id: &str) -> PathBuf {
         self.sessions_dir().join(format!("{session_id}.json"))
     }
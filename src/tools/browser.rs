@@ -15,6 +15,15 @@ use uuid::Uuid;
 
 static BROWSER_SESSION: OnceLock<Mutex<Option<BrowserSession>>> = OnceLock::new();
 
+const SKIPPED_PROFILE_DIRS: [&str; 6] = [
+    "Cache",
+    "Code Cache",
+    "DawnCache",
+    "GPUCache",
+    "GrShaderCache",
+    "ShaderCache",
+];
+
 #[derive(Clone, Debug, Deserialize, JsonSchema, Serialize)]
 pub struct BrowserControlArgs {
     /// JavaScript to run inside an async function with `browser`, `context`, and `page` available.
@@ -278,6 +287,7 @@ fn chrome_launch_args(
 
 async fn wait_for_cdp(port: u16, child: &mut Child) -> Result<(), String> {
     let url = format!("http://127.0.0.1:{port}/json/version");
+    let client = reqwest::Client::new();
     let deadline = Instant::now() + Duration::from_secs(15);
     while Instant::now() < deadline {
         if let Some(status) = child
@@ -288,7 +298,7 @@ async fn wait_for_cdp(port: u16, child: &mut Child) -> Result<(), String> {
                 "Chrome exited before DevTools became available (status: {status})"
             ));
         }
-        if let Ok(response) = reqwest::get(&url).await
+        if let Ok(response) = client.get(&url).send().await
             && response.status().is_success()
         {
             return Ok(());
@@ -557,9 +567,17 @@ fn copy_dir_recursive(source: &Path, destination: &Path) -> Result<(), std::io::
     fs::create_dir_all(destination)?;
     for entry in fs::read_dir(source)? {
         let entry = entry?;
-        let source_path = entry.path();
-        let destination_path = destination.join(entry.file_name());
+        let file_name = entry.file_name();
         let metadata = entry.file_type()?;
+        if metadata.is_dir()
+            && SKIPPED_PROFILE_DIRS
+                .iter()
+                .any(|skipped| file_name == *skipped)
+        {
+            continue;
+        }
+        let source_path = entry.path();
+        let destination_path = destination.join(&file_name);
         if metadata.is_dir() {
             copy_dir_recursive(&source_path, &destination_path)?;
         } else {
@@ -654,6 +672,24 @@ mod tests {
         assert!(args.contains(&"https://example.com".to_string()));
     }
 
+    #[test]
+    fn profile_copy_skips_regenerated_cache_directories() {
+        let temp = tempfile::tempdir().expect("temp dir");
+        let source = temp.path().join("Default");
+        fs::create_dir_all(source.join("Code Cache/js")).expect("code cache");
+        fs::create_dir_all(source.join("Network")).expect("network dir");
+        fs::write(source.join("Code Cache/js/index"), "cache").expect("cache file");
+        fs::write(source.join("Network/Cookies"), "cookies").expect("cookies");
+        fs::write(source.join("Preferences"), "{}").expect("preferences");
+
+        let destination = temp.path().join("copy");
+        copy_dir_recursive(&source, &destination).expect("copy profile");
+
+        assert!(destination.join("Preferences").is_file());
+        assert!(destination.join("Network/Cookies").is_file());
+        assert!(!destination.join("Code Cache").exists());
+    }
+
     #[test]
     fn profile_selector_can_resolve_chrome_profile_directory_name() {
         let temp = tempfile::tempdir().expect("temp dir");
@@ -1,9 +1,21 @@
+use encoding_rs::{Encoding, UTF_8};
+use reqwest::StatusCode;
+use reqwest::header::{
+    CONTENT_TYPE, ETAG, HeaderValue, IF_MODIFIED_SINCE, IF_NONE_MATCH, LAST_MODIFIED,
+};
 use schemars::JsonSchema;
 use serde::{Deserialize, Serialize};
+use std::collections::{HashMap, VecDeque};
+use std::sync::{Mutex, OnceLock};
 use std::time::Duration;
 
 const MAX_RESPONSE_LENGTH: usize = 1_000_000;
+const MAX_RESPONSE_BYTES: usize = MAX_RESPONSE_LENGTH * 4;
 const FETCH_TIMEOUT_SECONDS: u64 = 30;
+const RESPONSE_CACHE_CAPACITY: usize = 32;
+const RESPONSE_CACHE_MAX_BYTES: usize = 8 * 1024 * 1024;
+const RESPONSE_CACHE_MAX_ENTRY_BYTES: usize = 1024 * 1024;
+pub(crate) const JINA_READER_URL: &str = "https://r.jina.ai";
 
 #[derive(Clone, Debug, Deserialize, JsonSchema, Serialize)]
 pub struct FetchArgs {
@@ -11,44 +23,319 @@ pub struct FetchArgs {
 }
 
 pub async fn fetch(args: FetchArgs) -> Result<String, String> {
-    let jina_url = if is_jina_reader_url(&args.url) {
+    fetch_with_reader(JINA_READER_URL, args).await
+}
+
+pub(crate) async fn fetch_with_reader(reader_url: &str, args: FetchArgs) -> Result<String, String> {
+    let jina_url = if is_reader_url(reader_url, &args.url) {
         args.url.clone()
     } else {
-        format!("https://r.jina.ai/{}", args.url)
+        format!("{reader_url}/{}", args.url)
     };
 
-    let client = reqwest::Client::builder()
-        .timeout(Duration::from_secs(FETCH_TIMEOUT_SECONDS))
-        .build()
-        .map_err(|err| format!("Error fetching URL {}: {err}", args.url))?;
-    let response = client
-        .get(&jina_url)
+    let client = fetch_client()
+        .ok_or_else(|| format!("Error fetching URL {}: HTTP client unavailable", args.url))?;
+    let cached = cached_response(&jina_url);
+    let mut request = client.get(&jina_url);
+    if let Some(cached) = &cached {
+        if let Some(etag) = &cached.etag {
+            request = request.header(IF_NONE_MATCH, etag.clone());
+        }
+        if let Some(last_modified) = &cached.last_modified {
+            request = request.header(IF_MODIFIED_SINCE, last_modified.clone());
+        }
+    }
+    let response = request
         .send()
         .await
         .map_err(|err| format!("Error fetching URL {}: {err}", args.url))?;
     let status = response.status();
-    let text = response
-        .text()
-        .await
-        .map_err(|err| format!("Error fetching URL {}: {err}", args.url))?;
-    if !status.is_success() {
-        return Err(format!(
-            "Error fetching URL {}: HTTP {status}\n{text}",
-            args.url
-        ));
-    }
+    let text = if status == StatusCode::NOT_MODIFIED
+        && let Some(cached) = cached
+    {
+        cached.text
+    } else {
+        let etag = response.headers().get(ETAG).cloned();
+        let last_modified = response.headers().get(LAST_MODIFIED).cloned();
+        let text = read_capped_body(response)
+            .await
+            .map_err(|err| format!("Error fetching URL {}: {err}", args.url))?;
+        if !status.is_success() {
+            return Err(format!(
+                "Error fetching URL {}: HTTP {status}\n{text}",
+                args.url
+            ));
+        }
+        if etag.is_some() || last_modified.is_some() {
+            store_cached_response(
+                jina_url,
+                CachedResponse {
+                    etag,
+                    last_modified,
+                    text: text.clone(),
+                },
+            );
+        }
+        text
+    };
 
     if text.len() > MAX_RESPONSE_LENGTH {
-        let truncated = text.chars().take(MAX_RESPONSE_LENGTH).collect::<String>();
+        let end = text
+            .char_indices()
+            .nth(MAX_RESPONSE_LENGTH)
+            .map_or(text.len(), |(index, _)| index);
         Ok(format!(
             "{}\n\n[Content truncated due to size limitations]",
-            truncated
+            &text[..end]
         ))
     } else {
         Ok(format!("[URL]: {}\n\n{text}", args.url))
     }
 }
 
-fn is_jina_reader_url(url: &str) -> bool {
-    url.starts_with("https://r.jina.ai/") || url.starts_with("http://r.jina.ai/")
+async fn read_capped_body(mut response: reqwest::Response) -> Result<String, reqwest::Error> {
+    let encoding = response_encoding(&response);
+    let expected_len = response
+        .content_length()
+        .map_or(0, |len| (len as usize).min(MAX_RESPONSE_BYTES + 1));
+    let mut body = Vec::with_capacity(expected_len);
+    while body.len() <= MAX_RESPONSE_BYTES
+        && let Some(chunk) = response.chunk().await?
+    {
+        body.extend_from_slice(&chunk);
+    }
+    let truncated = body.len() > MAX_RESPONSE_BYTES;
+    body.truncate(MAX_RESPONSE_BYTES);
+
+    let mut decoder = encoding.new_decoder();
+    let mut text = String::with_capacity(
+        decoder
+            .max_utf8_buffer_length(body.len())
+            .unwrap_or(body.len()),
+    );
+    let _ = decoder.decode_to_string(&body, &mut text, !truncated);
+    Ok(text)
+}
+
+fn response_encoding(response: &reqwest::Response) -> &'static Encoding {
+    response
+        .headers()
+        .get(CONTENT_TYPE)
+        .and_then(|value| value.to_str().ok())
+        .and_then(|content_type| {
+            content_type.split(';').skip(1).find_map(|param| {
+                let (name, value) = param.split_once('=')?;
+                name.trim()
+                    .eq_ignore_ascii_case("charset")
+                    .then(|| value.trim().trim_matches('"'))
+            })
+        })
+        .and_then(|label| Encoding::for_label(label.as_bytes()))
+        .unwrap_or(UTF_8)
+}
+
+#[derive(Clone, Debug)]
+struct CachedResponse {
+    etag: Option<HeaderValue>,
+    last_modified: Option<HeaderValue>,
+    text: String,
+}
+
+#[derive(Debug, Default)]
+struct ResponseCache {
+    entries: HashMap<String, CachedResponse>,
+    order: VecDeque<String>,
+    total_bytes: usize,
+}
+
+fn response_cache() -> &'static Mutex<ResponseCache> {
+    static CACHE: OnceLock<Mutex<ResponseCache>> = OnceLock::new();
+    CACHE.get_or_init(|| Mutex::new(ResponseCache::default()))
+}
+
+fn cached_response(url: &str) -> Option<CachedResponse> {
+    response_cache().lock().ok()?.entries.get(url).cloned()
+}
+
+fn store_cached_response(url: String, response: CachedResponse) {
+    let Ok(mut cache) = response_cache().lock() else {
+        return;
+    };
+    if let Some(previous) = cache.entries.remove(&url) {
+        cache.total_bytes -= previous.text.len();
+        cache.order.retain(|cached_url| cached_url != &url);
+    }
+    let size = response.text.len();
+    if size > RESPONSE_CACHE_MAX_ENTRY_BYTES {
+        return;
+    }
+    while (cache.entries.len() >= RESPONSE_CACHE_CAPACITY
+        || cache.total_bytes + size > RESPONSE_CACHE_MAX_BYTES)
+        && let Some(oldest) = cache.order.pop_front()
+    {
+        if let Some(evicted) = cache.entries.remove(&oldest) {
+            cache.total_bytes -= evicted.text.len();
+        }
+    }
+    cache.total_bytes += size;
+    cache.order.push_back(url.clone());
+    cache.entries.insert(url, response);
+}
+
+fn fetch_client() -> Option<&'static reqwest::Client> {
+    static CLIENT: OnceLock<Option<reqwest::Client>> = OnceLock::new();
+    CLIENT
+        .get_or_init(|| {
+            reqwest::Client::builder()
+                .timeout(Duration::from_secs(FETCH_TIMEOUT_SECONDS))
+                .build()
+                .ok()
+        })
+        .as_ref()
+}
+
+fn is_reader_url(reader_url: &str, url: &str) -> bool {
+    url.strip_prefix(reader_url)
+        .is_some_and(|path| path.starts_with('/'))
+        || url.starts_with("https://r.jina.ai/")
+        || url.starts_with("http://r.jina.ai/")
+}
+
+#[cfg(test)]
+mod tests {
+    use wiremock::matchers::{header, method, path};
+    use wiremock::{Mock, MockServer, ResponseTemplate};
+
+    use super::*;
+
+    fn fetch_args(url: &str) -> FetchArgs {
+        FetchArgs {
+            url: url.to_string(),
+        }
+    }
+
+    #[tokio::test]
+    async fn fetch_decodes_body_with_response_charset() {
+        let server = MockServer::start().await;
+        Mock::given(method("GET"))
+            .and(path("/latin1"))
+            .respond_with(ResponseTemplate::new(200).set_body_raw(
+                b"caf\xe9 cr\xe8me".to_vec(),
+                "text/plain; charset=ISO-8859-1",
+            ))
+            .mount(&server)
+            .await;
+
+        let output = fetch_with_reader(&server.uri(), fetch_args("latin1"))
+            .await
+            .expect("fetch");
+
+        assert_eq!(output, "[URL]: latin1\n\ncaf\u{e9} cr\u{e8}me");
+    }
+
+    #[tokio::test]
+    async fn fetch_reuses_cached_body_on_not_modified() {
+        let server = MockServer::start().await;
+        Mock::given(method("GET"))
+            .and(path("/cached"))
+            .and(header("if-none-match", "\"v1\""))
+            .respond_with(ResponseTemplate::new(304))
+            .mount(&server)
+            .await;
+        Mock::given(method("GET"))
+            .and(path("/cached"))
+            .respond_with(
+                ResponseTemplate::new(200)
+                    .insert_header("etag", "\"v1\"")
+                    .set_body_string("first body"),
+            )
+            .up_to_n_times(1)
+            .mount(&server)
+            .await;
+
+        for _ in 0..2 {
+            let output = fetch_with_reader(&server.uri(), fetch_args("cached"))
+                .await
+                .expect("fetch");
+            assert_eq!(output, "[URL]: cached\n\nfirst body");
+        }
+        assert_eq!(server.received_requests().await.expect("requests").len(), 2);
+    }
+
+    #[tokio::test]
+    async fn fetch_replaces_cached_body_when_content_changes() {
+        let server = MockServer::start().await;
+        Mock::given(method("GET"))
+            .and(path("/changing"))
+            .and(header("if-none-match", "\"v2\""))
+            .respond_with(ResponseTemplate::new(304))
+            .mount(&server)
+            .await;
+        Mock::given(method("GET"))
+            .and(path("/changing"))
+            .and(header("if-none-match", "\"v1\""))
+            .respond_with(
+                ResponseTemplate::new(200)
+                    .insert_header("etag", "\"v2\"")
+                    .set_body_string("new body"),
+            )
+            .mount(&server)
+            .await;
+        Mock::given(method("GET"))
+            .and(path("/changing"))
+            .respond_with(
+                ResponseTemplate::new(200)
+                    .insert_header("etag", "\"v1\"")
+                    .set_body_string("old body"),
+            )
+            .up_to_n_times(1)
+            .mount(&server)
+            .await;
+
+        let mut outputs = Vec::new();
+        for _ in 0..3 {
+            outputs.push(
+                fetch_with_reader(&server.uri(), fetch_args("changing"))
+                    .await
+                    .expect("fetch"),
+            );
+        }
+
+        assert_eq!(
+            outputs,
+            [
+                "[URL]: changing\n\nold body",
+                "[URL]: changing\n\nnew body",
+                "[URL]: changing\n\nnew body",
+            ]
+        );
+    }
+
+    #[tokio::test]
+    async fn fetch_does_not_cache_large_bodies() {
+        let server = MockServer::start().await;
+        Mock::given(method("GET"))
+            .and(path("/large"))
+            .respond_with(
+                ResponseTemplate::new(200)
+                    .insert_header("etag", "\"large\"")
+                    .set_body_string("x".repeat(RESPONSE_CACHE_MAX_ENTRY_BYTES + 1)),
+            )
+            .mount(&server)
+            .await;
+
+        for _ in 0..2 {
+            fetch_with_reader(&server.uri(), fetch_args("large"))
+                .await
+                .expect("fetch");
+        }
+
+        let requests = server.received_requests().await.expect("requests");
+        assert_eq!(requests.len(), 2);
+        assert!(
+            requests
+                .iter()
+                .all(|request| !request.headers.contains_key("if-none-match"))
+        );
+    }
 }
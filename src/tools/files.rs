@@ -1,10 +1,15 @@
+use std::fmt::{self, Write as _};
 use std::fs;
+use std::io::{self, Read};
 use std::path::{Path, PathBuf};
 
 use schemars::JsonSchema;
 use serde::{Deserialize, Serialize};
 use similar::TextDiff;
 
+const MAX_READ_BYTES: usize = 2_000_000;
+const MAX_DIFF_BYTES: usize = 200_000;
+
 #[derive(Clone, Debug, Deserialize, JsonSchema, Serialize)]
 pub struct ReadFileArgs {
     pub path: String,
@@ -24,9 +29,13 @@ pub struct SearchReplaceArgs {
 }
 
 pub async fn read_file(args: ReadFileArgs) -> Result<String, String> {
+    run_blocking(move || read_file_blocking(args)).await
+}
+
+fn read_file_blocking(args: ReadFileArgs) -> Result<String, String> {
     let path = sanitize_path(&args.path);
-    match fs::read_to_string(&path) {
-        Ok(content) => Ok(format!("[FILE]: {}\n{}", path.display(), content)),
+    match read_file_with_header(&path) {
+        Ok(content) => Ok(content),
         Err(err) if err.kind() == std::io::ErrorKind::NotFound => {
             Ok(format!("file not found: {}", path.display()))
         }
@@ -34,13 +43,59 @@ pub async fn read_file(args: ReadFileArgs) -> Result<String, String> {
     }
 }
 
+fn read_file_with_header(path: &Path) -> io::Result<String> {
+    let file = fs::File::open(path)?;
+    let size = file
+        .metadata()
+        .map_or(0, |metadata| metadata.len() as usize);
+    let mut content = format!("[FILE]: {}\n", path.display()).into_bytes();
+    let header_len = content.len();
+    content.reserve(size.min(MAX_READ_BYTES + 1));
+    file.take(MAX_READ_BYTES as u64 + 1)
+        .read_to_end(&mut content)?;
+    let truncated = content.len() - header_len > MAX_READ_BYTES;
+    content.truncate(header_len + MAX_READ_BYTES);
+
+    let mut content = match String::from_utf8(content) {
+        Ok(content) => content,
+        Err(err) if truncated && err.utf8_error().error_len().is_none() => {
+            let valid_up_to = err.utf8_error().valid_up_to();
+            let mut bytes = err.into_bytes();
+            bytes.truncate(valid_up_to);
+            String::from_utf8(bytes).map_err(|_| invalid_utf8())?
+        }
+        Err(_) => return Err(invalid_utf8()),
+    };
+    if truncated {
+        content.push_str("\n\n[Content truncated due to size limitations]");
+    }
+    Ok(content)
+}
+
+fn invalid_utf8() -> io::Error {
+    io::Error::new(
+        io::ErrorKind::InvalidData,
+        "stream did not contain valid UTF-8",
+    )
+}
+
 pub async fn write_file(args: WriteFileArgs) -> Result<String, String> {
+    run_blocking(move || write_file_blocking(args)).await
+}
+
+fn write_file_blocking(args: WriteFileArgs) -> Result<String, String> {
     let path = sanitize_path(&args.path);
-    if let Some(parent) = path.parent() {
+    if let Some(parent) = path.parent()
+        && !parent.is_dir()
+    {
         fs::create_dir_all(parent).map_err(|err| format!("Error creating directories: {err}"))?;
     }
 
-    let previous = fs::read_to_string(&path).unwrap_or_default();
+    let previous = fs::read_to_string(&path).ok();
+    if previous.as_deref() == Some(args.contents.as_str()) {
+        return Ok("Success".to_string());
+    }
+    let previous = previous.unwrap_or_default();
     fs::write(&path, &args.contents).map_err(|err| format!("Error writing to file: {err}"))?;
 
     let diff = unified_diff(
@@ -58,6 +113,10 @@ pub async fn write_file(args: WriteFileArgs) -> Result<String, String> {
 }
 
 pub async fn search_replace(args: SearchReplaceArgs) -> Result<String, String> {
+    run_blocking(move || search_replace_blocking(args)).await
+}
+
+fn search_replace_blocking(args: SearchReplaceArgs) -> Result<String, String> {
     let path = sanitize_path(&args.path);
     let content = match fs::read_to_string(&path) {
         Ok(content) => content,
@@ -67,12 +126,20 @@ pub async fn search_replace(args: SearchReplaceArgs) -> Result<String, String> {
         Err(err) => return Ok(format!("IOError while reading file: {err}")),
     };
 
-    if !content.contains(&args.old_text) {
+    let mut new_content = String::with_capacity(content.len());
+    let mut occurrences = 0;
+    let mut copied_until = 0;
+    for (index, matched) in content.match_indices(&args.old_text) {
+        new_content.push_str(&content[copied_until..index]);
+        new_content.push_str(&args.new_text);
+        copied_until = index + matched.len();
+        occurrences += 1;
+    }
+    if occurrences == 0 {
         return Ok(format!("Text not found in file: {}", path.display()));
     }
+    new_content.push_str(&content[copied_until..]);
 
-    let occurrences = content.matches(&args.old_text).count();
-    let new_content = content.replace(&args.old_text, &args.new_text);
     let diff = unified_diff(
         &content,
         &new_content,
@@ -86,6 +153,15 @@ pub async fn search_replace(args: SearchReplaceArgs) -> Result<String, String> {
     ))
 }
 
+async fn run_blocking<F>(task: F) -> Result<String, String>
+where
+    F: FnOnce() -> Result<String, String> + Send + 'static,
+{
+    tokio::task::spawn_blocking(task)
+        .await
+        .map_err(|err| format!("file task failed: {err}"))?
+}
+
 pub fn sanitize_path(path: &str) -> PathBuf {
     let expanded = if path == "~" {
         dirs::home_dir()
@@ -107,10 +183,27 @@ pub fn sanitize_path(path: &str) -> PathBuf {
 }
 
 fn unified_diff(old: &str, new: &str, old_name: &str, new_name: &str) -> String {
-    TextDiff::from_lines(old, new)
-        .unified_diff()
-        .header(old_name, new_name)
-        .to_string()
+    let diff = TextDiff::from_lines(old, new);
+    let mut out = BoundedString::default();
+    if write!(out, "{}", diff.unified_diff().header(old_name, new_name)).is_err() {
+        let keep = out.0.rfind('\n').map_or(0, |index| index + 1);
+        out.0.truncate(keep);
+        out.0.push_str("[Diff truncated due to size limitations]\n");
+    }
+    out.0
+}
+
+#[derive(Default)]
+struct BoundedString(String);
+
+impl fmt::Write for BoundedString {
+    fn write_str(&mut self, text: &str) -> fmt::Result {
+        if self.0.len() + text.len() > MAX_DIFF_BYTES {
+            return Err(fmt::Error);
+        }
+        self.0.push_str(text);
+        Ok(())
+    }
 }
 
 fn file_name(path: &Path) -> String {
@@ -2,6 +2,7 @@ use async_openai::{Client, config::OpenAIConfig};
 use schemars::JsonSchema;
 use serde::{Deserialize, Serialize};
 use serde_json::json;
+use std::sync::{Mutex, OnceLock};
 
 #[derive(Clone, Debug, Deserialize, JsonSchema, Serialize)]
 pub struct GenImageArgs {
@@ -17,11 +18,7 @@ pub async fn gen_image(args: GenImageArgs) -> Result<String, String> {
     let base_url = std::env::var("AGENT_BASE_URL")
         .or_else(|_| std::env::var("OPENAI_BASE_URL"))
         .unwrap_or_else(|_| "https://api.openai.com/v1".to_string());
-    let client = Client::with_config(
-        OpenAIConfig::new()
-            .with_api_base(base_url)
-            .with_api_key(api_key),
-    );
+    let client = image_client(base_url, api_key);
     let response: serde_json::Value = client
         .images()
         .generate_byot(json!({
@@ -34,3 +31,35 @@ pub async fn gen_image(args: GenImageArgs) -> Result<String, String> {
         .map_err(|err| format!("Error creating images: {err}"))?;
     Ok(response.to_string())
 }
+
+struct CachedImageClient {
+    base_url: String,
+    api_key: String,
+    client: Client<OpenAIConfig>,
+}
+
+fn image_client(base_url: String, api_key: String) -> Client<OpenAIConfig> {
+    static CLIENT: OnceLock<Mutex<Option<CachedImageClient>>> = OnceLock::new();
+    let mut cached = CLIENT
+        .get_or_init(|| Mutex::new(None))
+        .lock()
+        .unwrap_or_else(|err| err.into_inner());
+    if let Some(cached) = cached.as_ref()
+        && cached.base_url == base_url
+        && cached.api_key == api_key
+    {
+        return cached.client.clone();
+    }
+
+    let client = Client::with_config(
+        OpenAIConfig::new()
+            .with_api_base(base_url.clone())
+            .with_api_key(api_key.clone()),
+    );
+    *cached = Some(CachedImageClient {
+        base_url,
+        api_key,
+        client: client.clone(),
+    });
+    client
+}
@@ -6,7 +6,7 @@ use std::time::Instant;
 use crate::agent::{CancellationToken, ToolResult, ToolStatus};
 use crate::tools::browser::{BrowserControlArgs, browser_control};
 use crate::tools::communicate::{CommunicateArgs, communicate};
-use crate::tools::fetch::{FetchArgs, fetch};
+use crate::tools::fetch::{FetchArgs, JINA_READER_URL, fetch_with_reader};
 use crate::tools::files::{
     ReadFileArgs, SearchReplaceArgs, WriteFileArgs, read_file, search_replace, write_file,
 };
@@ -24,6 +24,7 @@ pub struct ToolDefinition {
 #[derive(Clone, Debug)]
 pub struct ToolRegistry {
     definitions: Vec<ToolDefinition>,
+    fetch_reader_url: String,
 }
 
 impl Default for ToolRegistry {
@@ -77,7 +78,16 @@ impl ToolRegistry {
             ));
         }
 
-        Self { definitions }
+        Self {
+            definitions,
+            fetch_reader_url: JINA_READER_URL.to_string(),
+        }
+    }
+
+    #[cfg(test)]
+    pub(crate) fn with_fetch_reader_url(mut self, reader_url: impl Into<String>) -> Self {
+        self.fetch_reader_url = reader_url.into();
+        self
     }
 
     pub fn definitions(&self) -> &[ToolDefinition] {
@@ -124,7 +134,7 @@ impl ToolRegistry {
                 Err(err) => Err(format!("invalid tool arguments: {err}")),
             },
             "fetch" => match serde_json::from_value::<FetchArgs>(arguments) {
-                Ok(args) => fetch(args).await,
+                Ok(args) => fetch_with_reader(&self.fetch_reader_url, args).await,
                 Err(err) => Err(format!("invalid tool arguments: {err}")),
             },
             "read_file" => match serde_json::from_value::<ReadFileArgs>(arguments) {
@@ -1,3 +1,4 @@
+use std::fmt::Write as _;
 use std::process::Stdio;
 use std::time::Duration;
 
@@ -151,8 +152,8 @@ fn kill_process_group(child: &Child) {
 }
 
 fn format_completed_output(output: std::process::Output) -> String {
-    let mut combined = String::new();
-    combined.push_str(&String::from_utf8_lossy(&output.stdout));
+    let mut combined = String::from_utf8(output.stdout)
+        .unwrap_or_else(|err| String::from_utf8_lossy(err.as_bytes()).into_owned());
     combined.push_str(&String::from_utf8_lossy(&output.stderr));
 
     if !output.status.success() {
@@ -160,7 +161,7 @@ fn format_completed_output(output: std::process::Output) -> String {
             combined.push('\n');
         }
         let code = output.status.code().unwrap_or(1);
-        combined.push_str(&format!("(exit code: {code})"));
+        let _ = write!(combined, "(exit code: {code})");
     }
 
     combined
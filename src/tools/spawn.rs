@@ -37,10 +37,10 @@ pub async fn spawn(args: SpawnArgs) -> Result<String, String> {
         .await
         .map_err(|err| format!("Error spawning agent: {err}"))?;
 
-    let stdout = String::from_utf8_lossy(&output.stdout).to_string();
-    let stderr = String::from_utf8_lossy(&output.stderr).to_string();
+    let stdout = String::from_utf8_lossy(&output.stdout);
 
     if !output.status.success() {
+        let stderr = String::from_utf8_lossy(&output.stderr);
         let mut error = String::new();
         if !stdout.trim().is_empty() {
             error.push_str(stdout.trim_end());
@@ -342,8 +342,9 @@ async fn handle_realtime_event(
         RealtimeEvent::Error(message) => return Err(RealtimeError::Connection(message).into()),
         RealtimeEvent::ResponseDone { tool_calls, usage } => {
             if tool_calls.is_empty() {
-                attach_usage_to_latest_voice_assistant(context.session, usage);
-                context.store.save(context.session)?;
+                if attach_usage_to_latest_voice_assistant(context.session, usage) {
+                    context.store.save(context.session)?;
+                }
             } else {
                 handle_tool_calls(tool_calls, usage, context).await?;
             }
@@ -459,9 +460,9 @@ fn assistant_message(content: String, usage: Option<crate::agent::Usage>) -> Age
 fn attach_usage_to_latest_voice_assistant(
     session: &mut Session,
     usage: Option<crate::agent::Usage>,
-) {
+) -> bool {
     let Some(usage) = usage else {
-        return;
+        return false;
     };
 
     if let Some(AgentMessage::Assistant(assistant)) = session
@@ -472,12 +473,13 @@ fn attach_usage_to_latest_voice_assistant(
         && assistant.usage.is_none()
     {
         assistant.usage = Some(usage);
-        return;
+        return true;
     }
 
     session
         .messages
         .push(assistant_message(String::new(), Some(usage)));
+    true
 }
 
 fn print_cost_and_context(session: &Session, model_name: &str) {
@@ -551,6 +553,9 @@ impl InputAudioGate {
         playback: &crate::voice::audio::PlaybackQueue,
         samples: &[i16],
     ) -> InputAudioAction {
+        if !playback.is_active_within(PLAYBACK_ECHO_SUPPRESSION_HANGOVER) {
+            return InputAudioAction::Forward;
+        }
         input_audio_action_with_volume(playback, samples, self.system_volume.current())
     }
 }
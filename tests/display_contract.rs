@@ -52,6 +52,15 @@ fn assistant_plain_text_content_is_preserved() {
     assert_eq!(strip_ansi(&rendered).trim(), "Plain text");
 }
 
+#[test]
+fn assistant_indented_code_blocks_are_highlighted() {
+    let display = TerminalDisplay::new();
+    let rendered = display.format_assistant_content("Example:\n\n    let x = 1;\n\nDone");
+
+    assert!(strip_ansi(&rendered).contains("let x = 1;"));
+    assert!(rendered.contains("\x1b[38;2;"));
+}
+
 #[test]
 fn tool_panels_render_without_raw_tool_call_json() {
     let display = TerminalDisplay::new();
@@ -220,6 +229,102 @@ fn shell_command_exit_code_marker_still_renders_error() {
     assert!(!rendered.contains("(exit code: 7)"));
 }
 
+#[test]
+fn shell_command_exit_code_marker_is_read_from_end_of_output() {
+    let display = TerminalDisplay::new();
+    let rendered = display.format_tool_result(&ToolResult {
+        tool_call_id: "call_1".to_string(),
+        name: "run_shell_command".to_string(),
+        status: ToolStatus::Success,
+        content: "log: (exit code: 3) earlier\nboom\n(exit code: 7)".to_string(),
+        elapsed_ms: None,
+    });
+
+    assert!(rendered.contains("[ERR Done (7)]"));
+    assert!(rendered.contains("log: (exit code: 3) earlier"));
+    assert!(rendered.contains("boom"));
+    assert!(!rendered.contains("(exit code: 7)"));
+}
+
+#[test]
+fn repeated_tool_output_renders_consistently_per_tool() {
+    let display = TerminalDisplay::new();
+    let result = |name: &str| ToolResult {
+        tool_call_id: "call_1".to_string(),
+        name: name.to_string(),
+        status: ToolStatus::Success,
+        content: "[FILE]: ./main.rs\nfn main() {}\n".to_string(),
+        elapsed_ms: None,
+    };
+
+    let first = display.format_tool_result(&result("read_file"));
+    let shell = display.format_tool_result(&result("run_shell_command"));
+    let second = display.format_tool_result(&result("read_file"));
+
+    assert_eq!(first, second);
+    assert!(first.contains("\x1b[38;2;"));
+    assert!(!shell.contains("\x1b[38;2;"));
+}
+
+#[test]
+fn blank_tool_output_renders_empty_panel() {
+    let display = TerminalDisplay::new();
+    let rendered = display.format_tool_result(&ToolResult {
+        tool_call_id: "call_1".to_string(),
+        name: "run_shell_command".to_string(),
+        status: ToolStatus::Success,
+        content: " \n\n".to_string(),
+        elapsed_ms: None,
+    });
+    let plain = strip_ansi(&rendered);
+
+    assert!(plain.contains("[OK Done]"));
+    assert_eq!(plain.lines().filter(|line| line.contains('│')).count(), 1);
+}
+
+#[test]
+fn long_tool_output_preview_is_truncated() {
+    let display = TerminalDisplay::new();
+    let content = (1..=100)
+        .map(|line| format!("line {line}"))
+        .collect::<Vec<_>>()
+        .join("\n");
+    let rendered = display.format_tool_result(&ToolResult {
+        tool_call_id: "call_1".to_string(),
+        name: "run_shell_command".to_string(),
+        status: ToolStatus::Success,
+        content,
+        elapsed_ms: None,
+    });
+    let plain = strip_ansi(&rendered);
+
+    assert!(plain.contains("line 30 "));
+    assert!(!plain.contains("line 31 "));
+    assert!(plain.contains("..."));
+}
+
+#[test]
+fn long_read_file_preview_is_highlighted_and_truncated() {
+    let display = TerminalDisplay::new();
+    let body = (1..=100)
+        .map(|line| format!("let line_{line} = {line};"))
+        .collect::<Vec<_>>()
+        .join("\n");
+    let rendered = display.format_tool_result(&ToolResult {
+        tool_call_id: "call_1".to_string(),
+        name: "read_file".to_string(),
+        status: ToolStatus::Success,
+        content: format!("[FILE]: ./main.rs\n{body}"),
+        elapsed_ms: None,
+    });
+    let plain = strip_ansi(&rendered);
+
+    assert!(rendered.contains("\x1b[38;2;"));
+    assert!(plain.contains("let line_29 = 29;"));
+    assert!(!plain.contains("let line_30 = 30;"));
+    assert!(plain.contains("..."));
+}
+
 struct EnvGuard {
     key: &'static str,
     previous: Option<String>,
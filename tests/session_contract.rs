@@ -80,6 +80,25 @@ fn session_labels_are_ordered_by_recently_saved_first() {
     assert_eq!(labels[1], "zz-old\told conversation");
 }
 
+#[test]
+fn latest_session_pointer_follows_the_most_recent_save() {
+    let temp = tempfile::tempdir().expect("temp dir");
+    let store = SessionStore::with_root(temp.path().join(".agent"));
+    let first = Session::new("first".to_string(), Vec::new());
+    let second = Session::new("second".to_string(), Vec::new());
+
+    store.save(&first).expect("save first");
+    store.save(&first).expect("save first again");
+    assert_eq!(store.load(None).expect("load latest").session_id, "first");
+
+    store.save(&second).expect("save second");
+    assert_eq!(store.load(None).expect("load latest").session_id, "second");
+    assert_eq!(
+        std::fs::read_to_string(store.latest_session_path()).expect("latest"),
+        "second\n"
+    );
+}
+
 #[test]
 fn new_session_ids_are_guids() {
     let temp = tempfile::tempdir().expect("temp dir");
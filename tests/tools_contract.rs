@@ -284,6 +284,63 @@ async fn file_tools_read_write_and_search_replace_with_diffs() {
     assert!(replaced.contains("+three"));
 }
 
+#[tokio::test]
+async fn write_file_caps_oversized_diffs() {
+    let temp = tempfile::tempdir().expect("temp dir");
+    let path = temp.path().join("large.txt");
+    let contents = (0..50_000)
+        .map(|line| format!("line {line}\n"))
+        .collect::<String>();
+
+    let write = write_file(WriteFileArgs {
+        path: path.to_string_lossy().to_string(),
+        contents: contents.clone(),
+    })
+    .await
+    .expect("write");
+
+    assert!(write.starts_with("Success\n\nDiff:\n"));
+    assert!(write.ends_with("[Diff truncated due to size limitations]\n"));
+    assert!(write.len() < 250_000);
+    assert_eq!(std::fs::read_to_string(&path).expect("read back"), contents);
+}
+
+#[tokio::test]
+async fn read_file_truncates_oversized_files_on_a_character_boundary() {
+    let temp = tempfile::tempdir().expect("temp dir");
+    let path = temp.path().join("large.txt");
+    std::fs::write(&path, format!("a{}", "é".repeat(1_500_000))).expect("write large file");
+
+    let read = read_file(ReadFileArgs {
+        path: path.to_string_lossy().to_string(),
+    })
+    .await
+    .expect("read");
+
+    assert!(read.starts_with("[FILE]:"));
+    assert!(read.ends_with("[Content truncated due to size limitations]"));
+    assert!(!read.contains('\u{fffd}'));
+    assert!(read.len() < 2_100_000);
+}
+
+#[tokio::test]
+async fn read_file_reports_binary_files_as_invalid_utf8() {
+    let temp = tempfile::tempdir().expect("temp dir");
+    let path = temp.path().join("image.bin");
+    std::fs::write(&path, [0x89, b'P', b'N', b'G', 0xff, 0xfe, 0x00]).expect("write binary file");
+
+    let read = read_file(ReadFileArgs {
+        path: path.to_string_lossy().to_string(),
+    })
+    .await
+    .expect("read");
+
+    assert_eq!(
+        read,
+        "IOError while reading file: stream did not contain valid UTF-8"
+    );
+}
+
 #[tokio::test]
 #[ignore = "external network smoke for production cutover audits"]
 async fn fetch_live_example_dot_com() {